@@ -0,0 +1 @@
+# Raiz do projeto no sys.path: os testes importam `modules.*` como o podcast_clipper
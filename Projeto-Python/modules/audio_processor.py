@@ -1,15 +1,84 @@
-import whisper
 import time
 
+from modules.chunked_transcriber import ChunkedTranscriber, deslocar
+from modules.pcm_audio import SharedPCM
+from modules.transcription_cache import TranscriptionCache
+from modules.vad import EnergyVAD, transcrever_regioes
+
+# Modelos já carregados neste processo, compartilhados entre instâncias
+_MODELOS = {}
+
 class AudioProcessor: # Nome da classe deve ser exatamente este
-    def __init__(self, model_size='tiny'):
-        print(f"→ Carregando modelo Whisper ({model_size})...")
-        self.model = whisper.load_model(model_size)
+    def __init__(self, model_size='tiny', language=None, use_cache=True, verbose=False, workers=1, vad=True):
+        self.model_size = model_size
+        self.workers = workers  # > 1: transcrição em trechos paralelos
+        self.vad = vad  # Pula trechos sem fala antes do Whisper
+        self.language = language
+        self.verbose = verbose
+        self.cache = TranscriptionCache() if use_cache else None
+        self._model = None
 
-    def process_video(self, video_path):
+    @property
+    def model(self):
+        # O Whisper só é carregado quando realmente precisamos transcrever,
+        # e uma única vez por processo (o daemon reaproveita entre jobs)
+        if self._model is None:
+            if self.model_size not in _MODELOS:
+                import whisper
+                print(f"→ Carregando modelo Whisper ({self.model_size})...")
+                _MODELOS[self.model_size] = whisper.load_model(self.model_size)
+            self._model = _MODELOS[self.model_size]
+        return self._model
+
+    def process_video(self, video_path, pcm=None):
         print("\n[PASSO 1/3] 🎤 Transcrevendo áudio (IA)...")
         start = time.time()
         # Word timestamps ativado para as legendas
-        result = self.model.transcribe(video_path, word_timestamps=True, verbose=False)
+        opcoes = {'word_timestamps': True, 'task': 'transcribe'}
+        # O modo em trechos entra na chave: o resultado pode diferir um pouco
+        opcoes_cache = dict(opcoes, modo='trechos') if self.workers > 1 else dict(opcoes)
+        if self.vad:
+            opcoes_cache['vad'] = True
+
+        if self.cache is not None:
+            result = self.cache.buscar(video_path, self.model_size, self.language, opcoes_cache)
+            if result is not None:
+                print("✓ Transcrição recuperada do cache (Whisper não carregado).")
+                return result
+
+        # Whisper lê o PCM compartilhado (memmap) em vez de decodificar o vídeo de novo
+        if pcm is None:
+            pcm = SharedPCM(video_path)
+        regioes = self._regioes_fala(pcm.analise) if self.vad else None
+        if self.workers > 1:
+            transcritor = ChunkedTranscriber(self.model_size, self.workers)
+            result = transcritor.transcrever(pcm, regioes=regioes, language=self.language, **opcoes)
+        else:
+            result = transcrever_regioes(self.model, pcm.analise, pcm.SR_ANALISE, regioes,
+                                         language=self.language, verbose=self.verbose, **opcoes)
         print(f"✓ Concluído em {int(time.time() - start)} segundos.")
-        return result
\ No newline at end of file
+
+        if self.cache is not None:
+            self.cache.salvar(video_path, self.model_size, self.language, opcoes_cache, result)
+        return result
+
+    def transcrever_audio(self, audio, offset=0.0):
+        """
+        Transcreve um bloco de PCM mono 16 kHz já em memória (modo ao vivo),
+        com os tempos deslocados para `offset` na linha do tempo da gravação.
+        """
+        regioes = self._regioes_fala(audio) if self.vad else None
+        result = transcrever_regioes(
+            self.model, audio, SharedPCM.SR_ANALISE, regioes,
+            language=self.language, verbose=None, word_timestamps=True, task='transcribe'
+        )
+        return deslocar(result, offset)
+
+    def _regioes_fala(self, audio):
+        duracao = len(audio) / SharedPCM.SR_ANALISE
+        regioes = EnergyVAD().regioes(audio, SharedPCM.SR_ANALISE)
+        pulado = duracao - sum(b - a for a, b in regioes)
+        print(f"  🔇 VAD: {pulado:.0f}s sem fala ignorados ({100 * pulado / max(duracao, 1e-9):.0f}% do áudio)")
+        if regioes and pulado < 0.02 * duracao:
+            return None  # Quase tudo é fala: não vale copiar o áudio
+        return regioes
@@ -0,0 +1,74 @@
+import numpy as np
+
+
+class CameraPathSolver:
+    """
+    Trajetória da câmera resolvida OFFLINE, com o clipe inteiro de uma vez.
+    Recebe as detecções cruas (tempo, x, confiança) e resolve o suavizador
+    de Whittaker de segunda ordem (equivalente ao Kalman/RTS de um modelo
+    de velocidade aleatória): minimiza
+
+        sum(c_i * (z_i - x_i)^2) + lambda * sum((z_{i+1} - 2 z_i + z_{i-1})^2)
+
+    num único sistema linear. Amostras sem rosto têm peso zero e são
+    preenchidas pela própria suavização; não há atraso como no filtro
+    causal, porque o futuro também é usado. Se a velocidade passar do
+    limite, lambda cresce e o sistema é resolvido de novo.
+    Cortes de câmera dividem o clipe em trechos independentes, então a
+    câmera salta no corte em vez de deslizar através dele.
+    """
+
+    def __init__(self, periodo=3.0, max_velocidade=0.35, iteracoes=6):
+        self.periodo = periodo  # Oscilações mais curtas que isso (s) são removidas
+        self.max_velocidade = max_velocidade  # Fração da largura do vídeo por segundo
+        self.iteracoes = iteracoes
+
+    def resolver(self, tempos, xs, confiancas, cortes, duracao, fps, largura):
+        """
+        Retorna o centro X do recorte para cada frame de saída.
+        tempos/xs/confiancas: amostras do tracking (x = NaN quando não há rosto).
+        cortes: instantes dos cortes de câmera.
+        """
+        tempos = np.asarray(tempos, dtype=np.float64)
+        xs = np.asarray(xs, dtype=np.float64)
+        pesos = np.where(np.isnan(xs), 0.0, np.asarray(confiancas, dtype=np.float64))
+        xs = np.nan_to_num(xs, nan=largura / 2)
+
+        n_frames = max(1, int(np.ceil(duracao * fps)))
+        frames_t = np.arange(n_frames) / fps
+        centros = np.full(n_frames, largura / 2)
+
+        limites = np.concatenate(([-np.inf], np.sort(cortes), [np.inf]))
+        anterior = largura / 2
+        for a, b in zip(limites[:-1], limites[1:]):
+            sel = (tempos >= a) & (tempos < b)
+            quadros = (frames_t >= a) & (frames_t < b)
+            if not quadros.any():
+                continue
+            if not sel.any() or pesos[sel].sum() == 0:
+                centros[quadros] = anterior  # Trecho sem nenhum rosto: mantém a câmera
+                continue
+            z = self._suavizar(tempos[sel], xs[sel], pesos[sel], largura)
+            centros[quadros] = np.interp(frames_t[quadros], tempos[sel], z)
+            anterior = z[-1]
+        return centros
+
+    def _suavizar(self, t, x, c, largura):
+        n = len(x)
+        if n < 3:
+            return np.full(n, np.average(x, weights=c))
+
+        dt = max(float(np.median(np.diff(t))), 1e-3)
+        lam = (self.periodo / (2 * np.pi * dt)) ** 4
+
+        D = np.diff(np.eye(n), 2, axis=0)
+        P = D.T @ D
+        W = np.diag(c) + 1e-9 * np.eye(n)  # Regulariza trechos longos sem rosto
+        limite = self.max_velocidade * largura
+
+        for _ in range(self.iteracoes):
+            z = np.linalg.solve(W + lam * P, c * x)
+            if np.max(np.abs(np.diff(z)) / np.maximum(np.diff(t), dt)) <= limite:
+                break
+            lam *= 4  # Muito rápido: suaviza mais
+        return z
@@ -0,0 +1,149 @@
+import os
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from modules.pcm_audio import energia_quadros
+from modules.vad import recortar_regioes, transcrever_regioes
+
+
+def pontos_de_corte(audio, sr, alvo=450, minimo=300, maximo=600, quadro=0.1):
+    """
+    Divide o áudio em trechos de ~5 a 10 minutos, sempre cortando no ponto
+    mais silencioso (energia média de 0,5 s) dentro da faixa permitida.
+    Retorna a lista de (inicio, fim) em segundos.
+    """
+    energia = energia_quadros(audio, sr, quadro)
+    # Suaviza com média móvel de 0,5 s para não cortar numa pausa de meia sílaba
+    largura = max(1, int(0.5 / quadro))
+    suave = np.convolve(energia, np.ones(largura) / largura, mode='same')
+
+    total = len(audio) / sr
+    limites = [0.0]
+    pos = 0
+    n = len(suave)
+    while (n - pos) * quadro > maximo:
+        a = pos + int(minimo / quadro)
+        b = min(n, pos + int(maximo / quadro))
+        # Preferência suave pelo tamanho alvo: penaliza pontos longe dele
+        distancia = np.abs(np.arange(a, b) - (pos + alvo / quadro)) * quadro / alvo
+        k = a + int(np.argmin(suave[a:b] + 3.0 * distancia))
+        limites.append(k * quadro)
+        pos = k
+    limites.append(total)
+    return list(zip(limites[:-1], limites[1:]))
+
+
+# --- Processos de transcrição (cada um com seu próprio modelo) ---
+_worker = {}
+
+
+def _init_worker(model_size, threads):
+    import torch
+    import whisper
+    torch.set_num_threads(threads)
+    _worker['model'] = whisper.load_model(model_size)
+
+
+def _transcrever_trecho(pcm, inicio, fim, regioes, opcoes):
+    audio = pcm.fatia_analise(inicio, fim)
+    resultado = transcrever_regioes(_worker['model'], audio, pcm.SR_ANALISE, regioes, **opcoes)
+    return deslocar(resultado, inicio)
+
+
+def deslocar(resultado, offset):
+    """Leva os tempos de um trecho de volta para o tempo global do episódio"""
+    for seg in resultado.get('segments', []):
+        seg['start'] += offset
+        seg['end'] += offset
+        for w in seg.get('words', []):
+            w['start'] += offset
+            w['end'] += offset
+    return resultado
+
+
+def costurar(resultados, trechos):
+    """
+    Junta os resultados no mesmo formato {'segments': [...words...]} do Whisper.
+    Os trechos não se sobrepõem (são cortados nos silêncios), então só as
+    primeiras palavras de cada trecho são comparadas com o fim do trecho
+    anterior: as que começam antes dele são duplicadas e saem. Palavras que
+    começam depois do fim do próprio trecho também saem, e tempos que vazam
+    do trecho são limitados a ele. Dentro de um trecho nada é descartado,
+    mesmo que o Whisper comece um segmento antes do fim do anterior.
+    """
+    segments = []
+    fim_anterior = 0.0  # Fim da última palavra aceita no trecho anterior
+    for resultado, (inicio, fim) in zip(resultados, trechos):
+        fronteira = True  # Ainda nas primeiras palavras do trecho
+        ultimo_fim = fim_anterior
+        for seg in resultado.get('segments', []):
+            palavras = seg.get('words', [])
+            if palavras:
+                aceitas = []
+                for w in palavras:
+                    if w['start'] >= fim or (fronteira and w['start'] < fim_anterior - 0.01):
+                        continue
+                    fronteira = False
+                    aceitas.append(w)
+                if not aceitas:
+                    continue
+                for w in aceitas:
+                    w['end'] = min(w['end'], fim)
+                if len(aceitas) != len(palavras):
+                    seg['text'] = "".join(w['word'] for w in aceitas)
+                seg['words'] = aceitas
+                seg['start'] = max(seg['start'], aceitas[0]['start'])
+                ultimo_fim = aceitas[-1]['end']
+            elif (fronteira and seg['start'] < fim_anterior) or seg['start'] >= fim:
+                continue
+            else:
+                fronteira = False
+            seg['end'] = min(seg['end'], fim)
+            seg['id'] = len(segments)
+            segments.append(seg)
+        fim_anterior = ultimo_fim
+
+    idiomas = Counter(r.get('language') for r in resultados if r.get('language'))
+    return {
+        'text': "".join(seg['text'] for seg in segments),
+        'segments': segments,
+        'language': idiomas.most_common(1)[0][0] if idiomas else None,
+    }
+
+
+class ChunkedTranscriber:
+    """
+    Transcrição em trechos paralelos: corta o áudio nos silêncios em blocos de
+    5 a 10 minutos, transcreve cada um num processo com seu próprio Whisper
+    e costura as palavras de volta no tempo global.
+    """
+
+    def __init__(self, model_size, workers, alvo=450):
+        self.model_size = model_size
+        self.workers = workers
+        self.alvo = alvo
+
+    def transcrever(self, pcm, regioes=None, **opcoes):
+        # regioes: fala detectada pelo VAD no episódio todo (None = sem filtro)
+        trechos = pontos_de_corte(pcm.analise, pcm.SR_ANALISE, alvo=self.alvo)
+        workers = min(self.workers, len(trechos))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        print(f"  ✂️ {len(trechos)} trechos em {workers} processos ({threads} threads cada)")
+
+        opcoes = dict(opcoes, verbose=None)  # Logs de vários processos se misturam
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_size, threads)
+        ) as pool:
+            futuros = [
+                pool.submit(_transcrever_trecho, pcm, a, b,
+                            None if regioes is None else recortar_regioes(regioes, a, b), opcoes)
+                for a, b in trechos
+            ]
+            resultados = [f.result() for f in futuros]
+        return costurar(resultados, trechos)
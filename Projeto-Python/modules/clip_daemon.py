@@ -0,0 +1,194 @@
+import json
+import queue
+import threading
+import time
+import traceback
+import urllib.error
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PORTA_PADRAO = 8765
+
+
+class ClipDaemon:
+    """
+    Processo residente que mantém Whisper, DNN de rosto e cliente da IA
+    carregados e atende jobs por HTTP local (só 127.0.0.1):
+    - POST /jobs        {"video": ..., opções}  -> {"id": ...}
+    - GET  /jobs/<id>   estado do job (na_fila, processando, concluido, erro)
+    - GET  /status      fila e jobs conhecidos
+    Os jobs rodam um por vez, numa única thread, porque os modelos são
+    compartilhados; `executar(job)` é a função do pipeline.
+    Só os `max_encerrados` jobs terminados mais recentes ficam consultáveis.
+    """
+
+    def __init__(self, executar, host="127.0.0.1", porta=PORTA_PADRAO, max_encerrados=200):
+        self.executar = executar
+        self.host = host
+        self.porta = porta
+        self.max_encerrados = max_encerrados
+        self.jobs = {}
+        self.fila = queue.Queue()
+        self._lock = threading.Lock()
+
+    def enviar(self, job):
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self.jobs[job_id] = {
+                'id': job_id,
+                'job': job,
+                'estado': 'na_fila',
+                'enviado': time.time(),
+            }
+        self.fila.put(job_id)
+        return job_id
+
+    def consultar(self, job_id):
+        with self._lock:
+            registro = self.jobs.get(job_id)
+            if registro is None:
+                return None
+            registro = dict(registro)
+            if registro['estado'] == 'na_fila':
+                na_fila = [j for j in self.jobs.values() if j['estado'] == 'na_fila']
+                registro['posicao'] = sorted(na_fila, key=lambda j: j['enviado']).index(self.jobs[job_id]) + 1
+            return registro
+
+    def status(self):
+        with self._lock:
+            estados = {}
+            for j in self.jobs.values():
+                estados[j['estado']] = estados.get(j['estado'], 0) + 1
+            return {
+                'na_fila': self.fila.qsize(),
+                'estados': estados,
+                'jobs': [
+                    {'id': j['id'], 'video': j['job'].get('video'), 'estado': j['estado']}
+                    for j in sorted(self.jobs.values(), key=lambda j: j['enviado'])
+                ],
+            }
+
+    def _atualizar(self, job_id, **campos):
+        with self._lock:
+            self.jobs[job_id].update(campos)
+            if campos.get('estado') in ('concluido', 'erro'):
+                self._podar()
+
+    def _podar(self):
+        """Esquece os jobs terminados mais antigos (a memória do daemon não cresce sem limite)"""
+        encerrados = sorted(
+            (j for j in self.jobs.values() if j['estado'] in ('concluido', 'erro')),
+            key=lambda j: j['fim']
+        )
+        for j in encerrados[:max(0, len(encerrados) - self.max_encerrados)]:
+            del self.jobs[j['id']]
+
+    def _trabalhar(self):
+        while True:
+            job_id = self.fila.get()
+            job = self.jobs[job_id]['job']
+            print(f"\n📥 Job {job_id}: {job.get('video')}")
+            self._atualizar(job_id, estado='processando', inicio=time.time())
+            try:
+                resultado = self.executar(job)
+                self._atualizar(job_id, estado='concluido', fim=time.time(), resultado=resultado)
+                print(f"✅ Job {job_id} concluído")
+            except Exception as e:
+                traceback.print_exc()
+                self._atualizar(job_id, estado='erro', fim=time.time(), erro=str(e))
+                print(f"❌ Job {job_id} falhou: {e}")
+
+    def servir(self):
+        threading.Thread(target=self._trabalhar, daemon=True).start()
+        servidor = ThreadingHTTPServer((self.host, self.porta), _handler(self))
+        print(f"🟢 Daemon pronto em http://{self.host}:{self.porta} (Ctrl+C para encerrar)")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            print("\n🛑 Encerrando daemon...")
+        finally:
+            servidor.server_close()
+
+
+def _handler(daemon):
+    class Handler(BaseHTTPRequestHandler):
+        def _responder(self, codigo, corpo):
+            dados = json.dumps(corpo, ensure_ascii=False, default=str).encode("utf-8")
+            self.send_response(codigo)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_GET(self):
+            if self.path == "/status":
+                return self._responder(200, daemon.status())
+            if self.path.startswith("/jobs/"):
+                registro = daemon.consultar(self.path[len("/jobs/"):])
+                if registro is None:
+                    return self._responder(404, {'erro': 'job desconhecido'})
+                return self._responder(200, registro)
+            self._responder(404, {'erro': 'rota desconhecida'})
+
+        def do_POST(self):
+            if self.path != "/jobs":
+                return self._responder(404, {'erro': 'rota desconhecida'})
+            try:
+                tamanho = int(self.headers.get("Content-Length", 0))
+                job = json.loads(self.rfile.read(tamanho) or b"{}")
+            except (ValueError, json.JSONDecodeError):
+                return self._responder(400, {'erro': 'JSON inválido'})
+            if not isinstance(job, dict) or not job.get('video'):
+                return self._responder(400, {'erro': 'campo "video" obrigatório'})
+            self._responder(202, {'id': daemon.enviar(job)})
+
+        def log_message(self, formato, *args):
+            pass  # As consultas de status a cada poucos segundos poluiriam o log
+
+    return Handler
+
+
+class DaemonClient:
+    """Cliente fino do ClipDaemon (usado pela CLI com --servidor / CLIPPER_DAEMON)"""
+
+    def __init__(self, url, timeout=10):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _pedir(self, caminho, corpo=None):
+        dados = None if corpo is None else json.dumps(corpo).encode("utf-8")
+        pedido = urllib.request.Request(
+            self.url + caminho, data=dados,
+            headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(pedido, timeout=self.timeout) as resposta:
+                return json.loads(resposta.read())
+        except urllib.error.HTTPError as e:
+            raise IOError(f"Daemon respondeu {e.code}: {e.read().decode('utf-8', 'replace')}")
+        except urllib.error.URLError as e:
+            raise IOError(f"Daemon indisponível em {self.url}: {e.reason}")
+
+    def enviar(self, job):
+        return self._pedir("/jobs", job)['id']
+
+    def consultar(self, job_id):
+        return self._pedir(f"/jobs/{job_id}")
+
+    def status(self):
+        return self._pedir("/status")
+
+    def aguardar(self, job_id, intervalo=2):
+        """Acompanha o job até terminar, mostrando as mudanças de estado"""
+        ultimo = None
+        while True:
+            registro = self.consultar(job_id)
+            estado = registro['estado']
+            descricao = estado if estado != 'na_fila' else f"na fila (posição {registro.get('posicao')})"
+            if descricao != ultimo:
+                print(f"  ⏳ Job {job_id}: {descricao}")
+                ultimo = descricao
+            if estado in ('concluido', 'erro'):
+                return registro
+            time.sleep(intervalo)
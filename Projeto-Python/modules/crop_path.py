@@ -0,0 +1,35 @@
+import cv2
+import numpy as np
+
+
+class CropPath:
+    """
+    Trajetória do recorte vertical (9:16) calculada UMA vez por clipe:
+    um offset X por frame de saída, indexado pelo número do frame.
+    O recorte + resize escreve sempre no mesmo buffer pré-alocado.
+    """
+
+    def __init__(self, offsets, fps, largura_alvo, tamanho_saida=(1080, 1920)):
+        self.offsets = np.asarray(offsets, dtype=np.int32)
+        self.fps = fps
+        self.largura_alvo = largura_alvo
+        self.tamanho_saida = tamanho_saida
+        self._buffer = np.empty((tamanho_saida[1], tamanho_saida[0], 3), dtype=np.uint8)
+
+    @classmethod
+    def from_centers(cls, centros, fps, tamanho_origem, tamanho_saida=(1080, 1920)):
+        """Trajetória a partir do centro X já calculado para cada frame de saída"""
+        w, h = tamanho_origem
+        largura_alvo = min(int(h * (9/16)), w)
+        offsets = np.clip(np.asarray(centros) - largura_alvo / 2, 0, w - largura_alvo)
+        return cls(offsets, fps, largura_alvo, tamanho_saida)
+
+    def indice(self, t):
+        return min(max(int(round(t * self.fps)), 0), len(self.offsets) - 1)
+
+    def recortar(self, frame, t):
+        """Recorta e redimensiona o frame do instante t no buffer de saída"""
+        x1 = self.offsets[self.indice(t)]
+        cropped = frame[:, x1:x1 + self.largura_alvo]
+        cv2.resize(cropped, self.tamanho_saida, dst=self._buffer)
+        return self._buffer
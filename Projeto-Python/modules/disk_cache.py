@@ -0,0 +1,158 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+
+# Diretório base dos caches (pode ser trocado pela variável de ambiente)
+CACHE_DIR = os.environ.get("CLIPPER_CACHE", ".cache")
+
+_BLOCO = 1024 * 1024  # 1 MB por amostra
+_AMOSTRAS = 16
+_hash_memo = {}
+
+
+def hash_arquivo(path):
+    """
+    Hash do CONTEÚDO do arquivo de mídia.
+    Arquivos pequenos são lidos inteiros; nos grandes (masters de várias horas)
+    lemos 16 blocos de 1 MB espalhados + o tamanho, o que já identifica o
+    conteúdo sem precisar ler dezenas de GB a cada execução.
+    """
+    st = os.stat(path)
+    memo = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if memo in _hash_memo:
+        return _hash_memo[memo]
+
+    h = hashlib.sha256()
+    h.update(str(st.st_size).encode())
+    with open(path, "rb") as f:
+        if st.st_size <= _BLOCO * _AMOSTRAS * 4:
+            for bloco in iter(lambda: f.read(_BLOCO), b""):
+                h.update(bloco)
+        else:
+            passo = (st.st_size - _BLOCO) // (_AMOSTRAS - 1)
+            for k in range(_AMOSTRAS):
+                f.seek(k * passo)
+                h.update(f.read(_BLOCO))
+
+    digest = h.hexdigest()
+    _hash_memo[memo] = digest
+    return digest
+
+
+def hash_dados(*partes):
+    """Hash estável de qualquer estrutura serializável em JSON"""
+    bruto = json.dumps(partes, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(bruto.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """Cache persistente em disco (um JSON por chave) com despejo por tamanho"""
+
+    def __init__(self, diretorio, max_bytes=2 * 1024**3):
+        self.diretorio = diretorio
+        self.max_bytes = max_bytes
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, f"{chave}.json")
+
+    def get(self, chave):
+        caminho = self._caminho(chave)
+        if not os.path.exists(caminho):
+            return None
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                valor = json.load(f)
+        except (OSError, ValueError):
+            # Entrada corrompida (ex: execução interrompida) - descarta
+            self._remover(caminho)
+            return None
+        # Atualiza o mtime para o despejo funcionar como LRU
+        try:
+            os.utime(caminho)
+        except OSError:
+            pass
+        return valor
+
+    def put(self, chave, valor):
+        caminho = self._caminho(chave)
+        temp = f"{caminho}.{os.getpid()}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(valor, f, ensure_ascii=False, default=float)
+        os.replace(temp, caminho)  # Escrita atômica
+        self._despejar()
+
+    def _remover(self, caminho):
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+    def _despejar(self):
+        despejar_lru(self.diretorio, self.max_bytes, (".json",))
+
+
+def despejar_lru(diretorio, max_bytes, extensoes, manter=()):
+    """
+    Remove os arquivos menos usados (mtime mais antigo) de `diretorio` com
+    as `extensoes` dadas até o total caber em `max_bytes`. Os caminhos em
+    `manter` (em uso nesta execução) nunca são removidos.
+    """
+    manter = {os.path.abspath(c) for c in manter}
+    entradas = []
+    total = 0
+    for nome in os.listdir(diretorio):
+        if not nome.endswith(tuple(extensoes)):
+            continue
+        caminho = os.path.join(diretorio, nome)
+        try:
+            st = os.stat(caminho)
+        except OSError:
+            continue
+        total += st.st_size
+        if os.path.abspath(caminho) not in manter:
+            entradas.append((st.st_mtime, st.st_size, caminho))
+
+    if total <= max_bytes:
+        return
+
+    entradas.sort()
+    for _, tamanho, caminho in entradas:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(caminho)
+        except OSError:
+            continue
+        total -= tamanho
+
+
+class ArrayCache:
+    """Cache persistente de arrays numpy (um .npy por chave), para etapas baratas de guardar"""
+
+    def __init__(self, diretorio, max_bytes=512 * 1024**2):
+        self.diretorio = diretorio
+        self.max_bytes = max_bytes
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    def obter(self, chave, construir):
+        caminho = os.path.join(self.diretorio, f"{chave}.npy")
+        if os.path.exists(caminho):
+            try:
+                valor = np.load(caminho)
+                try:
+                    os.utime(caminho)  # Atualiza o mtime para o despejo funcionar como LRU
+                except OSError:
+                    pass
+                return valor
+            except (OSError, ValueError):
+                os.remove(caminho)  # Arquivo corrompido: reconstrói
+        valor = np.asarray(construir())
+        temp = f"{caminho}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            np.save(f, valor)
+        os.replace(temp, caminho)  # Escrita atômica
+        despejar_lru(self.diretorio, self.max_bytes, (".npy",), manter=(caminho,))
+        return valor
@@ -0,0 +1,173 @@
+import os
+
+import numpy as np
+
+from modules.disk_cache import CACHE_DIR, hash_arquivo
+from modules.frame_sampler import SequentialFrameSampler
+from modules.shot_detector import ShotChangeDetector
+
+VERSAO = 1  # Muda quando o formato ou a detecção mudam (invalida os índices antigos)
+
+
+class FaceTrack:
+    """
+    Detecções cruas de rosto de um trecho (ou do episódio inteiro) em arrays:
+    tempos (n,), caixas (n, 4) com centro x, centro y, largura e altura no
+    vídeo original (NaN sem rosto), confiancas (n,) e os instantes dos
+    cortes de câmera. É a entrada do CameraPathSolver.
+    """
+
+    def __init__(self, tempos, caixas, confiancas, cortes):
+        self.tempos = np.asarray(tempos, dtype=np.float64)
+        self.caixas = np.asarray(caixas, dtype=np.float32).reshape(-1, 4)
+        self.confiancas = np.asarray(confiancas, dtype=np.float32)
+        self.cortes = np.asarray(cortes, dtype=np.float64)
+
+    @property
+    def xs(self):
+        return self.caixas[:, 0]
+
+    def __len__(self):
+        return len(self.tempos)
+
+    def fatia(self, inicio, fim):
+        """Trecho [inicio, fim] com os tempos relativos ao início (busca binária)"""
+        a, b = np.searchsorted(self.tempos, [inicio, fim], side='left')
+        c, d = np.searchsorted(self.cortes, [inicio, fim], side='right')
+        return FaceTrack(
+            self.tempos[a:b] - inicio,
+            self.caixas[a:b],
+            self.confiancas[a:b],
+            self.cortes[c:d] - inicio
+        )
+
+    def salvar(self, caminho):
+        temp = f"{caminho}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            np.savez_compressed(f, tempos=self.tempos, caixas=self.caixas,
+                                confiancas=self.confiancas, cortes=self.cortes)
+        os.replace(temp, caminho)
+
+    @classmethod
+    def carregar(cls, caminho):
+        with np.load(caminho) as dados:
+            return cls(dados['tempos'], dados['caixas'], dados['confiancas'], dados['cortes'])
+
+    @classmethod
+    def do_episodio(cls, tracker, video_path, duracao, tamanho_origem, intervalo=0.5,
+                    rastreamento='lote', diretorio=None, use_cache=True):
+        """
+        Índice de rostos do episódio inteiro, construído UMA vez e guardado
+        em CACHE_DIR/faces/ ao lado do hash da mídia. Mudar a seleção de
+        momentos ou a duração dos cortes só fatia este índice.
+        use_cache=False rastreia de novo sem ler nem gravar o cache.
+        """
+        nome = f"{hash_arquivo(video_path)}_{int(intervalo * 1000)}ms_{rastreamento}_v{VERSAO}.npz"
+
+        def construir():
+            print(f"🧑 Indexando rostos do episódio inteiro (1 amostra a cada {intervalo}s)...")
+            return rastrear_janela(tracker, video_path, 0, duracao, tamanho_origem, intervalo, rastreamento)
+
+        return cls._em_cache(diretorio, nome, construir, use_cache)
+
+    @classmethod
+    def da_janela(cls, tracker, video_path, inicio, fim, tamanho_origem, intervalo=0.2,
+                  rastreamento='lote', diretorio=None, use_cache=True):
+        """
+        Rastreamento de uma única janela (sem o índice do episódio), também
+        em cache: a prévia e o render final usam as mesmas detecções.
+        """
+        nome = (f"{hash_arquivo(video_path)}_{inicio:.3f}-{fim:.3f}_"
+                f"{int(intervalo * 1000)}ms_{rastreamento}_v{VERSAO}.npz")
+        return cls._em_cache(diretorio, nome, lambda: rastrear_janela(
+            tracker, video_path, inicio, fim, tamanho_origem, intervalo, rastreamento
+        ), use_cache)
+
+    @classmethod
+    def _em_cache(cls, diretorio, nome, construir, use_cache=True):
+        if not use_cache:
+            return construir()
+        diretorio = diretorio or os.path.join(CACHE_DIR, "faces")
+        os.makedirs(diretorio, exist_ok=True)
+        caminho = os.path.join(diretorio, nome)
+        if os.path.exists(caminho):
+            try:
+                faixa = cls.carregar(caminho)
+                print(f"✓ Rostos recuperados do cache ({len(faixa)} amostras).")
+                return faixa
+            except Exception:
+                os.remove(caminho)  # Arquivo corrompido: reconstrói
+
+        faixa = construir()
+        if len(faixa):
+            faixa.salvar(caminho)  # Rastreamento vazio não vai pro cache (vale tentar de novo)
+        return faixa
+
+
+def rastrear_janela(tracker, video_path, inicio, fim, tamanho_origem, intervalo=0.2,
+                    rastreamento='lote', tamanho_lote=32):
+    """
+    Decodifica [inicio, fim] uma vez e devolve as detecções cruas (FaceTrack,
+    tempos relativos ao início). A detecção só roda em cortes de câmera,
+    movimento ou a cada 2s no máximo; nas amostras estáticas a detecção
+    anterior é repetida. rastreamento='seguir' usa tracker.track_face,
+    'lote' usa o DNN em lote (tracker.detect_faces_full).
+    """
+    tracker.reset(contagem=True)
+    sampler = SequentialFrameSampler(video_path, inicio, fim, intervalo, tamanho_origem)
+    mudancas = ShotChangeDetector()
+    tempos, caixas, confiancas, cortes = [], [], [], []
+    sem_rosto = (np.full(4, np.nan), 0.0)
+
+    def rastrear_lote(lote):
+        # lote: (t, frame) para detectar ou (t, None) para repetir a detecção anterior
+        detectar = [f for _, f in lote if f is not None]
+        faces = None
+        try:
+            if detectar and rastreamento == 'seguir':
+                faces = iter([tracker.track_face(f) for f in detectar])
+            elif detectar:
+                faces = iter(tracker.detect_faces_full(detectar))
+        except Exception as e:
+            print(f"    ⚠️ Erro nos frames {lote[0][0]:.2f}s-{lote[-1][0]:.2f}s: {e}")
+        ultimo = (caixas[-1], confiancas[-1]) if caixas else sem_rosto
+        for t, frame in lote:
+            if frame is not None:
+                face = next(faces) if faces is not None else None
+                if face:
+                    caixa = np.array([face['x'], face['y'], face['w'], face['h']]) * sampler.escala
+                    ultimo = (caixa, face['confidence'])
+                else:
+                    ultimo = sem_rosto
+            tempos.append(t)
+            caixas.append(ultimo[0])
+            confiancas.append(ultimo[1])
+
+    lote = []
+    n_detectar = 0
+    for t, frame in sampler:
+        tipo = mudancas.classificar(frame, t)
+        if tipo == mudancas.CORTE and (lote or tempos):
+            # Corte de câmera: fecha o plano anterior e zera o rosto seguido;
+            # o solver trata cada plano separadamente (a câmera salta no corte)
+            rastrear_lote(lote)
+            lote, n_detectar = [], 0
+            tracker.reset()
+            cortes.append(t - intervalo / 2)
+        if tipo == mudancas.ESTATICO:
+            lote.append((t, None))
+        else:
+            lote.append((t, frame))
+            n_detectar += 1
+        if n_detectar >= tamanho_lote:
+            rastrear_lote(lote)
+            lote, n_detectar = [], 0
+    if lote:
+        rastrear_lote(lote)
+
+    print(f"    📊 {mudancas.resumo()}")
+    if rastreamento == 'seguir':
+        c = tracker.contagem
+        print(f"    📊 Rosto: {c['template']} por template, {c['roi']} re-detecções na ROI, "
+              f"{c['completa']} buscas no frame inteiro")
+    return FaceTrack(tempos, caixas, confiancas, cortes)
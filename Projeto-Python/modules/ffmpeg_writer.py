@@ -0,0 +1,111 @@
+import os
+import subprocess
+
+from modules.frame_sampler import FFMPEG_BIN
+
+
+def caminho_parcial(caminho):
+    """video_01.mp4 -> video_01.parcial.mp4 (a extensão fica, o ffmpeg deduz o formato por ela)"""
+    raiz, ext = os.path.splitext(caminho)
+    return f"{raiz}.parcial{ext}"
+
+
+class FFmpegPipeWriter:
+    """
+    Encoder ffmpeg alimentado por pipe com frames rgb24 crus.
+    O áudio do trecho (com fade in/out) é muxado na MESMA chamada do ffmpeg,
+    sem CompositeVideoClip e sem os arquivos *TEMP_MPY_wvf_snd.mp4 do moviepy.
+    O vídeo é escrito num arquivo .parcial e só troca de nome no final: um
+    corte interrompido nunca fica com o nome de um corte pronto.
+    """
+
+    def __init__(self, caminho, tamanho, fps, audio=None, fade=0.5, threads=4,
+                 preset='medium', crf=None, codec='libx264', audio_codec='aac', audio_formato=None):
+        # audio: (arquivo, inicio, duracao) ou None para vídeo mudo
+        # audio_formato: opções de entrada para áudio cru (ex: ["-f", "s16le", ...])
+        self.caminho = caminho
+        self.temp = caminho_parcial(caminho)
+        self.tamanho = tamanho
+        self.fps = fps
+        self.audio = audio
+        self.audio_formato = audio_formato or []
+        self.fade = fade
+        self.threads = threads
+        self.preset = preset
+        self.crf = crf
+        self.codec = codec
+        self.audio_codec = audio_codec
+        self.proc = None
+
+    def _comando(self):
+        w, h = self.tamanho
+        cmd = [
+            FFMPEG_BIN, "-y", "-v", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24",
+            "-s", f"{w}x{h}", "-r", str(self.fps),
+            "-i", "pipe:0",
+        ]
+        if self.audio is not None:
+            arquivo, inicio, duracao = self.audio
+            cmd += self.audio_formato
+            cmd += ["-ss", f"{inicio:.3f}", "-t", f"{duracao:.3f}", "-i", arquivo]
+            cmd += ["-map", "0:v:0", "-map", "1:a:0?"]
+            if self.fade and duracao > 2 * self.fade:
+                cmd += ["-af", (
+                    f"afade=t=in:st=0:d={self.fade},"
+                    f"afade=t=out:st={duracao - self.fade:.3f}:d={self.fade}"
+                )]
+            cmd += ["-c:a", self.audio_codec, "-shortest"]
+
+        cmd += [
+            "-c:v", self.codec,
+            "-preset", self.preset,
+            "-pix_fmt", "yuv420p",
+            "-threads", str(self.threads),
+        ]
+        if self.crf is not None:
+            cmd += ["-crf", str(self.crf)]
+        cmd += ["-movflags", "+faststart", self.temp]
+        return cmd
+
+    def __enter__(self):
+        self.proc = subprocess.Popen(
+            self._comando(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
+        return self
+
+    def escrever(self, frame):
+        try:
+            self.proc.stdin.write(memoryview(frame).cast("B"))
+        except BrokenPipeError:
+            raise IOError(f"ffmpeg encerrou durante a escrita: {self._erro()}")
+
+    def _erro(self):
+        try:
+            return self.proc.stderr.read().decode("utf-8", "replace").strip()[-2000:]
+        except Exception:
+            return ""
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            # Falhou no meio: mata o encoder e remove o arquivo parcial
+            self.proc.kill()
+            self.proc.wait()
+            if os.path.exists(self.temp):
+                os.remove(self.temp)
+            return False
+
+        try:
+            self.proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        erro = self._erro()
+        if self.proc.wait() != 0:
+            if os.path.exists(self.temp):
+                os.remove(self.temp)
+            raise IOError(f"ffmpeg falhou ao gerar {self.caminho}: {erro}")
+        os.replace(self.temp, self.caminho)
+        return False
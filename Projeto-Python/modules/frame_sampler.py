@@ -0,0 +1,117 @@
+import re
+import subprocess
+import tempfile
+import numpy as np
+
+try:
+    import imageio_ffmpeg
+    FFMPEG_BIN = imageio_ffmpeg.get_ffmpeg_exe()
+except Exception:
+    FFMPEG_BIN = "ffmpeg"
+
+
+def _ler_exato(stream, destino):
+    """Preenche o buffer inteiro a partir do pipe. Retorna False no fim do stream."""
+    view = memoryview(destino).cast("B")
+    lidos = 0
+    while lidos < len(view):
+        n = stream.readinto(view[lidos:])
+        if not n:
+            return False
+        lidos += n
+    return True
+
+
+def _cabecalho(video_path):
+    """Descrição dos streams que o ffmpeg imprime ao abrir o arquivo (sem decodificar)"""
+    proc = subprocess.run(
+        [FFMPEG_BIN, "-hide_banner", "-nostdin", "-i", video_path],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    return proc.stderr.decode("utf-8", "replace")
+
+
+def tem_audio(video_path):
+    """True se o arquivo tem pelo menos um stream de áudio"""
+    return re.search(r"Stream #.*: Audio:", _cabecalho(video_path)) is not None
+
+
+def tamanho_video(video_path):
+    """(largura, altura) do primeiro stream de vídeo, lidos do cabeçalho pelo ffmpeg"""
+    info = _cabecalho(video_path)
+    achado = re.search(r"Video:.*?(\d{2,5})x(\d{2,5})", info)
+    if achado is None:
+        raise IOError(f"Não foi possível ler o tamanho do vídeo {video_path}")
+    return int(achado.group(1)), int(achado.group(2))
+
+
+class SequentialFrameSampler:
+    """
+    Decodifica a janela [inicio, fim] do vídeo UMA vez, em ordem, e entrega
+    pares (t, frame) a cada `intervalo` segundos (t relativo ao início).
+    Substitui os get_frame(t) com seek + decode por amostra, que em fontes
+    H.264 de GOP longo custam mais do que renderizar o clipe.
+
+    Os frames saem em RGB numa resolução de análise reduzida; use `escala`
+    para converter coordenadas X de volta para o vídeo original.
+    Fonte ausente ou corrompida levanta IOError (com a mensagem do ffmpeg)
+    em vez de terminar sem nenhum frame.
+    """
+
+    def __init__(self, video_path, inicio, fim, intervalo, tamanho_origem, largura_analise=960):
+        self.video_path = video_path
+        self.inicio = max(0.0, float(inicio))
+        self.duracao = max(0.0, float(fim) - self.inicio)
+        self.intervalo = float(intervalo)
+
+        w, h = tamanho_origem
+        if largura_analise and largura_analise < w:
+            self.largura = int(largura_analise) // 2 * 2
+            self.altura = int(round(h * self.largura / w / 2)) * 2
+        else:
+            self.largura, self.altura = int(w), int(h)
+        self.escala = w / self.largura
+
+    def _comando(self):
+        return [
+            FFMPEG_BIN, "-v", "error", "-nostdin",
+            "-ss", f"{self.inicio:.3f}",  # Um único seek por janela
+            "-i", self.video_path,
+            "-t", f"{self.duracao:.3f}",
+            "-an", "-sn",
+            "-vf", f"fps={1.0 / self.intervalo:.6f},scale={self.largura}:{self.altura}",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-",
+        ]
+
+    def __iter__(self):
+        if self.duracao <= 0:
+            return
+
+        tamanho = self.largura * self.altura * 3
+        # stderr num arquivo temporário: um pipe cheio (fonte corrompida) travaria o ffmpeg
+        with tempfile.TemporaryFile() as erros:
+            proc = subprocess.Popen(
+                self._comando(),
+                stdout=subprocess.PIPE,
+                stderr=erros,
+                bufsize=tamanho
+            )
+            try:
+                k = 0
+                while True:
+                    frame = np.empty((self.altura, self.largura, 3), dtype=np.uint8)
+                    if not _ler_exato(proc.stdout, frame):
+                        break
+                    yield k * self.intervalo, frame
+                    k += 1
+            finally:
+                proc.stdout.close()
+                if proc.poll() is None:
+                    proc.kill()  # Consumidor parou antes do fim: não é erro
+                proc.wait()
+
+            # Só chega aqui se o stream terminou sozinho
+            if proc.returncode != 0:
+                erros.seek(0)
+                mensagem = erros.read().decode("utf-8", "replace").strip()[-2000:]
+                raise IOError(f"ffmpeg falhou ao ler {self.video_path}: {mensagem}")
@@ -0,0 +1,195 @@
+import json
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from modules.frame_sampler import FFMPEG_BIN, tamanho_video
+from modules.moment_detector import MomentDetector
+from modules.pcm_audio import SharedPCM, energia_quadros
+from modules.transcript_index import TranscriptIndex
+
+
+class _Fonte:
+    """O mínimo que o render_moment precisa saber do vídeo (sem abrir com o moviepy)"""
+
+    def __init__(self, w, h, duration):
+        self.w = w
+        self.h = h
+        self.duration = duration
+
+
+class LiveFollower:
+    """
+    Modo ao vivo: acompanha uma gravação que ainda está sendo escrita.
+    - O áudio novo chega por um único ffmpeg com `-follow 1` (lê o arquivo
+      crescendo, e encerra após `inatividade` segundos sem dados novos).
+    - A cada ~`janela` segundos o bloco é cortado no ponto mais silencioso
+      dos últimos segundos e transcrito com os tempos já deslocados.
+    - Só os segmentos novos passam pelos gatilhos; a seleção é incremental
+      (MomentDetector.selecionar_incremental) e cada momento decidido entra
+      na fila de renderização (backend ffmpeg), que roda em paralelo.
+    - O estado (transcrição, momentos, renderizados) fica em
+      `acompanhamento.json` na pasta de saída: ao reiniciar, o trecho já
+      processado não é refeito.
+    A gravação precisa estar num contêiner legível enquanto cresce
+    (mkv, ts, mp4 fragmentado); um mp4 comum só tem índice no final.
+    """
+
+    SR = SharedPCM.SR_ANALISE
+
+    def __init__(self, video_path, processador, clipper, output_dir="output", detector=None,
+                 max_clips=None, janela=60, inatividade=120, margem_corte=10):
+        self.video_path = video_path
+        self.processador = processador
+        self.clipper = clipper
+        self.output_dir = output_dir
+        self.detector = detector or MomentDetector()
+        self.max_clips = max_clips
+        self.janela = janela
+        self.inatividade = inatividade
+        self.margem_corte = margem_corte
+        self.caminho_estado = os.path.join(output_dir, "acompanhamento.json")
+        self.estado = self._carregar()
+        self._fila = ThreadPoolExecutor(max_workers=1)  # Um render por vez, tracker compartilhado
+        self._tamanho = None
+
+    def _carregar(self):
+        if os.path.exists(self.caminho_estado):
+            with open(self.caminho_estado, encoding="utf-8") as f:
+                estado = json.load(f)
+            if estado.get('video') == os.path.abspath(self.video_path):
+                print(f"♻️ Retomando a partir de {estado['processado_ate']:.0f}s "
+                      f"({len(estado['momentos'])} momentos já decididos)")
+                return estado
+        return {
+            'video': os.path.abspath(self.video_path),
+            'processado_ate': 0.0,
+            'segments': [],
+            'pesos': [],
+            'momentos': [],  # {'i', 'timestamp', 'score', 'renderizado'}
+        }
+
+    def _salvar(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        temp = f"{self.caminho_estado}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(self.estado, f, ensure_ascii=False, default=float)
+        os.replace(temp, self.caminho_estado)
+
+    def _abrir_audio(self, inicio):
+        cmd = [
+            FFMPEG_BIN, "-v", "error", "-nostdin",
+            "-follow", "1", "-rw_timeout", str(int(self.inatividade * 1e6)),
+            "-ss", f"{inicio:.3f}",
+            "-i", f"file:{os.path.abspath(self.video_path)}",
+            "-vn", "-ac", "1", "-ar", str(self.SR), "-f", "f32le", "-",
+        ]
+        return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def _ponto_de_corte(self, audio):
+        """Amostra de corte no trecho mais silencioso dos últimos `margem_corte` segundos"""
+        quadro = 0.1
+        energia = energia_quadros(audio, self.SR, quadro)
+        a = max(0, len(energia) - int(self.margem_corte / quadro))
+        return (a + int(np.argmin(energia[a:]))) * int(self.SR * quadro)
+
+    def executar(self):
+        print(f"👀 Acompanhando {self.video_path} (para após {self.inatividade}s sem dados novos)")
+        self._reagendar_pendentes()
+
+        proc = self._abrir_audio(self.estado['processado_ate'])
+        blocos, amostras = [], 0
+        try:
+            while True:
+                dados = proc.stdout.read(self.SR * 4)  # 1 s por leitura
+                if dados:
+                    bloco = np.frombuffer(dados[:len(dados) // 4 * 4], dtype=np.float32)
+                    blocos.append(bloco)
+                    amostras += len(bloco)
+                if len(dados) < self.SR * 4:
+                    break  # Fim do stream: a gravação parou (último bloco pode vir parcial)
+                if amostras >= self.janela * self.SR:
+                    audio = np.concatenate(blocos)
+                    corte = self._ponto_de_corte(audio)
+                    self._processar(audio[:corte], final=False)
+                    blocos, amostras = [audio[corte:]], len(audio) - corte
+        finally:
+            proc.stdout.close()
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+
+        # O resto é o final da gravação: agora todas as janelas estão completas
+        self._processar(np.concatenate(blocos) if blocos else np.zeros(0, np.float32), final=True)
+        self._fila.shutdown(wait=True)
+        self._salvar()
+        print(f"✅ Gravação encerrada em {self.estado['processado_ate']:.0f}s: "
+              f"{len(self.estado['momentos'])} cortes")
+
+    def _processar(self, audio, final):
+        inicio = self.estado['processado_ate']
+        if len(audio):
+            print(f"\n🎤 Transcrevendo {inicio:.0f}s–{inicio + len(audio) / self.SR:.0f}s...")
+            novos = self.processador.transcrever_audio(audio, offset=inicio).get('segments', [])
+            for seg in novos:
+                seg['id'] = len(self.estado['segments'])
+                self.estado['segments'].append(seg)
+            # Gatilhos só nos segmentos novos; os anteriores já estão pontuados
+            pesos = self.detector.pontuar_segmentos(TranscriptIndex({'segments': novos}))
+            self.estado['pesos'].extend(float(p) for p in pesos)
+            self.estado['processado_ate'] = inicio + len(audio) / self.SR
+
+        indice = TranscriptIndex({'segments': self.estado['segments']})
+        pesos = np.asarray(self.estado['pesos'], dtype=np.float64)
+        scores = self.detector.pontuar_janelas(indice, pesos)
+        candidatas = pesos > 0
+        fim = float('inf') if final else self.estado['processado_ate']
+
+        decididos = self.detector.selecionar_incremental(
+            indice.seg_inicios[candidatas], scores[candidatas],
+            [m['timestamp'] for m in self.estado['momentos']],
+            fim, self.max_clips
+        )
+        for m in decididos:
+            m = dict(m, i=len(self.estado['momentos']) + 1, renderizado=False)
+            self.estado['momentos'].append(m)
+            print(f"  ⭐ Momento {m['i']} em {m['timestamp']:.0f}s (pontuação {m['score']:.1f})")
+            self._agendar(m, indice)
+        self._salvar()
+
+    def _fonte(self):
+        if self._tamanho is None:
+            self._tamanho = tamanho_video(self.video_path)
+        w, h = self._tamanho
+        return _Fonte(w, h, self.estado['processado_ate'])
+
+    def _agendar(self, momento, indice):
+        """Tradução disparada agora; render na fila assim que houver vez"""
+        fonte = self._fonte()
+        start_t, end_t, _ = self.clipper._janela(momento['i'], momento, fonte.duration, self.output_dir)
+        ia = self.clipper.iniciar_ia([indice.textos(start_t, end_t)])[0]
+
+        def renderizar():
+            try:
+                caminho = self.clipper.render_moment(
+                    fonte, self.video_path, indice, momento['i'], momento, self.output_dir,
+                    logger=None, backend='ffmpeg', ia=ia
+                )
+            except Exception as e:
+                print(f"  ❌ Falha ao renderizar o corte {momento['i']}: {e}")
+                return None
+            momento['renderizado'] = True
+            print(f"  ✅ Corte {momento['i']} pronto: {caminho}")
+            return caminho
+
+        self._fila.submit(renderizar)
+
+    def _reagendar_pendentes(self):
+        """Momentos decididos numa execução anterior que não chegaram a ser renderizados"""
+        pendentes = [m for m in self.estado['momentos'] if not m.get('renderizado')]
+        if pendentes:
+            indice = TranscriptIndex({'segments': self.estado['segments']})
+            for m in pendentes:
+                self._agendar(m, indice)
@@ -0,0 +1,46 @@
+import os
+import time
+
+from modules.disk_cache import CACHE_DIR, DiskCache, hash_dados
+
+
+class LLMCache(DiskCache):
+    """
+    Cache persistente das respostas da IA, chaveado por modelo, prompts de
+    sistema e usuário e formato de resposta. Guarda só respostas JSON já
+    interpretadas com sucesso (nunca fallbacks), com validade (TTL).
+    """
+
+    def __init__(self, diretorio=None, max_bytes=256 * 1024**2, ttl=30 * 24 * 3600):
+        super().__init__(diretorio or os.path.join(CACHE_DIR, "ia"), max_bytes)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.expirados = 0
+
+    def chave(self, model, mensagens, response_format):
+        system = [m["content"] for m in mensagens if m["role"] == "system"]
+        user = [m["content"] for m in mensagens if m["role"] == "user"]
+        return hash_dados(model, system, user, response_format)
+
+    def buscar(self, model, mensagens, response_format):
+        chave = self.chave(model, mensagens, response_format)
+        entrada = self.get(chave)
+        if entrada is not None and self.ttl and time.time() - entrada.get("criado", 0) > self.ttl:
+            self._remover(self._caminho(chave))
+            self.expirados += 1
+            entrada = None
+
+        if entrada is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entrada["valor"]
+
+    def salvar(self, model, mensagens, response_format, valor):
+        self.put(self.chave(model, mensagens, response_format), {"criado": time.time(), "valor": valor})
+
+    def resumo(self):
+        total = self.hits + self.misses
+        taxa = 100 * self.hits / total if total else 0
+        return f"{self.hits} hits / {self.misses} misses ({taxa:.0f}% de acerto, {self.expirados} expirados)"
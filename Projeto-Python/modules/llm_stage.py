@@ -0,0 +1,141 @@
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+from groq import AsyncGroq, RateLimitError
+
+
+class TokenBucket:
+    """
+    Balde de tokens assíncrono: `por_minuto` unidades, reabastecido continuamente.
+    Cada pedido reserva os tokens na hora (o saldo pode ficar negativo) e
+    dorme até a reserva ser coberta, então a ordem de chegada é respeitada.
+    A conta é protegida por um threading.Lock: o mesmo balde serve a vários
+    event loops (cada `iniciar` roda o seu numa thread).
+    """
+
+    def __init__(self, por_minuto):
+        self.capacidade = float(por_minuto)
+        self.tokens = float(por_minuto)
+        self.taxa = self.capacidade / 60.0
+        self.ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    async def adquirir(self, n=1):
+        n = min(float(n), self.capacidade)
+        with self._lock:
+            agora = time.monotonic()
+            self.tokens = min(self.capacidade, self.tokens + (agora - self.ultimo) * self.taxa)
+            self.ultimo = agora
+            self.tokens -= n
+            espera = -self.tokens / self.taxa if self.tokens < 0 else 0.0
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+
+class LLMStage:
+    """
+    Etapa assíncrona de IA: dispara as requisições de TODOS os momentos de uma vez,
+    respeitando limites de requisições e tokens por minuto (token bucket) e
+    refazendo com backoff quando a API responde 429.
+
+    Roda num event loop em thread própria; `iniciar` devolve um Future por job,
+    então a renderização consome os resultados conforme chegam.
+    `base_url` permite apontar para um servidor local que imite a API
+    de chat completions (útil para testes).
+    Os limites por minuto valem para o LLMStage inteiro: várias chamadas de
+    `iniciar` (ex: um momento por vez no modo ao vivo) dividem os mesmos baldes.
+    """
+
+    def __init__(self, api_key, model, base_url=None, max_concorrencia=8,
+                 requests_por_minuto=30, tokens_por_minuto=6000, max_tentativas=5):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url
+        self.max_concorrencia = max_concorrencia
+        self.requests_por_minuto = requests_por_minuto
+        self.tokens_por_minuto = tokens_por_minuto
+        self.max_tentativas = max_tentativas
+        self._rpm = TokenBucket(requests_por_minuto)
+        self._tpm = TokenBucket(tokens_por_minuto)
+
+    def iniciar(self, jobs, interpretar, fallback):
+        """
+        jobs: lista de (mensagens, response_format).
+        interpretar(i, conteudo) converte a resposta; fallback(i) é usado se falhar
+        (inclusive se a própria etapa não conseguir começar): todo Future é resolvido.
+        """
+        futuros = [Future() for _ in jobs]
+        if not jobs:
+            return futuros
+        thread = threading.Thread(
+            target=lambda: asyncio.run(self._executar(jobs, futuros, interpretar, fallback)),
+            name="llm-stage",
+            daemon=True
+        )
+        thread.start()
+        return futuros
+
+    async def _executar(self, jobs, futuros, interpretar, fallback):
+        cliente = None
+
+        async def processar(i, mensagens, response_format, sem):
+            try:
+                conteudo = await self._chamar(cliente, mensagens, response_format, sem)
+                resultado = interpretar(i, conteudo)
+            except Exception as e:
+                print(f"⚠️ Erro na IA (corte {i + 1}): {e}")
+                resultado = fallback(i)
+            futuros[i].set_result(resultado)
+
+        try:
+            # Tudo dentro do try: se o cliente não subir, os Futures ainda são resolvidos
+            sem = asyncio.Semaphore(self.max_concorrencia)
+            cliente = AsyncGroq(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+            await asyncio.gather(*(processar(i, m, rf, sem) for i, (m, rf) in enumerate(jobs)))
+        except Exception as e:
+            print(f"⚠️ Etapa de IA interrompida: {e}")
+        finally:
+            if cliente is not None:
+                await cliente.close()
+            for i, f in enumerate(futuros):
+                if not f.done():
+                    try:
+                        f.set_result(fallback(i))
+                    except Exception as e:
+                        f.set_exception(e)
+
+    async def _chamar(self, cliente, mensagens, response_format, sem):
+        # Estimativa grosseira: ~4 caracteres por token, resposta do mesmo tamanho
+        tokens = 2 * sum(len(m["content"]) for m in mensagens) // 4
+
+        for tentativa in range(self.max_tentativas):
+            await self._rpm.adquirir(1)
+            await self._tpm.adquirir(tokens)
+            async with sem:
+                try:
+                    resposta = await cliente.chat.completions.create(
+                        messages=mensagens,
+                        model=self.model,
+                        response_format=response_format
+                    )
+                    return resposta.choices[0].message.content
+                except RateLimitError as e:
+                    espera = self._retry_after(e)
+                    if espera is None:
+                        espera = 2 ** tentativa + random.uniform(0, 1)
+            print(f"  ⏳ Limite da API (429), nova tentativa em {espera:.1f}s...")
+            await asyncio.sleep(espera)
+
+        raise RuntimeError(f"Limite da API excedido após {self.max_tentativas} tentativas")
+
+    def _retry_after(self, erro):
+        resposta = getattr(erro, "response", None)
+        if resposta is None:
+            return None
+        try:
+            return float(resposta.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
@@ -1,12 +1,133 @@
+import bisect
+import heapq
+import re
+
+import numpy as np
+
+from modules.transcript_index import TranscriptIndex
+
+# Vocabulário padrão de gatilhos (termo -> peso)
+GATILHOS_PADRAO = {
+    'pix': 1.0,
+    'doação': 1.0,
+    'pergunta': 1.0,
+    'mandou': 1.0,
+    'lê aí': 1.0,
+}
+
+
 class MomentDetector:
-    def find_best_moments(self, transcription, max_clips=10):
-        segments = transcription.get('segments', [])
-        triggers = ['pix', 'doação', 'pergunta', 'mandou', 'lê aí']
-        moments = []
-        for seg in segments:
-            if any(word in seg['text'].lower() for word in triggers):
-                # Evita clips sobrepostos (intervalo de 2 min)
-                if not moments or (seg['start'] - moments[-1]['timestamp'] > 120):
-                    moments.append({'timestamp': seg['start']})
-            if len(moments) >= max_clips: break
-        return moments
\ No newline at end of file
+    """
+    Detecção de momentos por pontuação:
+    1. Todos os gatilhos viram UM regex de alternação (uma passada por segmento).
+    2. Cada janela de `janela` segundos recebe a soma dos pesos dos gatilhos
+       encontrados (densidade x peso), via soma acumulada - tempo linear.
+    3. Um heap escolhe as top-k janelas que não se sobrepõem, no episódio todo,
+       então ficam os momentos mais fortes e não os primeiros que aparecem.
+    Opcionalmente soma a pontuação de áudio por segundo (AudioScorer).
+    """
+
+    def __init__(self, gatilhos=None, janela=40, espacamento=120):
+        self.gatilhos = {t.lower(): float(p) for t, p in (gatilhos or GATILHOS_PADRAO).items()}
+        self.janela = janela
+        self.espacamento = espacamento  # Distância mínima entre dois momentos
+
+        # Termos mais longos primeiro para a alternação preferir o match maior.
+        # Os termos casam como PREFIXO de palavra (como o `in` antigo, "pergunta"
+        # pega "perguntas" e "perguntaram", "pix" pega "pixes"), mas não no meio
+        # de outra palavra.
+        termos = sorted(self.gatilhos, key=len, reverse=True)
+        self._padrao = re.compile(
+            r'(?<!\w)(?:' + '|'.join(re.escape(t) for t in termos) + r')'
+        ) if termos else None
+
+    def pontuar_segmentos(self, indice):
+        """Soma dos pesos dos gatilhos encontrados em cada segmento"""
+        pesos = np.zeros(len(indice.seg_textos), dtype=np.float64)
+        if self._padrao is None:
+            return pesos
+        for k, texto in enumerate(indice.seg_textos):
+            for match in self._padrao.findall(texto.lower()):
+                pesos[k] += self.gatilhos[match]
+        return pesos
+
+    def pontuar_audio(self, inicios, audio_scores):
+        """Média da pontuação de áudio dentro da janela que começa em cada instante"""
+        acumulado = np.concatenate(([0.0], np.cumsum(audio_scores, dtype=np.float64)))
+        n = len(audio_scores)
+        a = np.clip(np.floor(inicios).astype(int), 0, n)
+        b = np.clip(a + int(self.janela), 0, n)
+        return (acumulado[b] - acumulado[a]) / np.maximum(b - a, 1)
+
+    def pontuar_janelas(self, indice, pesos=None):
+        """Pontuação da janela que começa em cada segmento"""
+        if pesos is None:
+            pesos = self.pontuar_segmentos(indice)
+        inicios = indice.seg_inicios
+        acumulado = np.concatenate(([0.0], np.cumsum(pesos)))
+        fim = np.searchsorted(inicios, inicios + self.janela, side='right')
+        return acumulado[fim] - acumulado[np.arange(len(inicios))]
+
+    def selecionar(self, inicios, scores, max_clips):
+        """Top-k janelas não sobrepostas (maior pontuação primeiro)"""
+        heap = [(-score, float(t)) for t, score in zip(inicios, scores) if score > 0]
+        heapq.heapify(heap)
+
+        distancia = max(self.janela, self.espacamento)
+        escolhidos = []  # Inícios aceitos, mantidos ordenados
+        pontuacao = {}
+        while heap and len(escolhidos) < max_clips:
+            neg_score, t = heapq.heappop(heap)
+            pos = bisect.bisect_left(escolhidos, t)
+            if pos > 0 and t - escolhidos[pos - 1] < distancia:
+                continue
+            if pos < len(escolhidos) and escolhidos[pos] - t < distancia:
+                continue
+            escolhidos.insert(pos, t)
+            pontuacao[t] = float(-neg_score)
+
+        return [{'timestamp': t, 'score': pontuacao[t]} for t in escolhidos]
+
+    def selecionar_incremental(self, inicios, scores, emitidos, fim, max_clips=None):
+        """
+        Seleção em fluxo (gravação em andamento). Uma janela só é emitida
+        quando nenhuma janela ainda incompleta pode disputar com ela, ou seja,
+        quando tudo até t + distância + janela já foi transcrito (`fim`).
+        Janelas ainda indecisas bloqueiam as vizinhas mais fracas, então o
+        resultado é o mesmo da seleção gulosa sobre o episódio inteiro.
+        Retorna só os momentos novos; `emitidos` são os inícios já entregues.
+        """
+        distancia = max(self.janela, self.espacamento)
+        bloqueados = sorted(emitidos)
+        novos = []
+        for k in np.argsort(-np.asarray(scores), kind='stable'):
+            if max_clips is not None and len(emitidos) + len(novos) >= max_clips:
+                break
+            t, score = float(inicios[k]), float(scores[k])
+            if score <= 0:
+                break
+            pos = bisect.bisect_left(bloqueados, t)
+            if pos > 0 and t - bloqueados[pos - 1] < distancia:
+                continue
+            if pos < len(bloqueados) and bloqueados[pos] - t < distancia:
+                continue
+            bloqueados.insert(pos, t)
+            if t + distancia + self.janela <= fim:
+                novos.append({'timestamp': t, 'score': score})
+        return sorted(novos, key=lambda m: m['timestamp'])
+
+    def find_best_moments(self, transcription, max_clips=10, indice=None, audio_scores=None, peso_audio=1.0):
+        # O mesmo índice da transcrição é compartilhado com o corte/IA
+        if indice is None:
+            indice = TranscriptIndex(transcription)
+        pesos = self.pontuar_segmentos(indice)
+        scores = self.pontuar_janelas(indice, pesos)
+
+        if audio_scores is not None and len(audio_scores):
+            # Com áudio, qualquer início de fala pode ser candidato
+            scores = scores + peso_audio * self.pontuar_audio(indice.seg_inicios, audio_scores)
+            candidatas = np.ones(len(scores), dtype=bool)
+        else:
+            # Candidatas: janelas que começam num gatilho (o corte abre no momento)
+            candidatas = pesos > 0
+        return self.selecionar(indice.seg_inicios[candidatas], scores[candidatas], max_clips)
@@ -0,0 +1,127 @@
+import os
+import subprocess
+
+import numpy as np
+
+from modules.disk_cache import CACHE_DIR, despejar_lru, hash_arquivo
+from modules.frame_sampler import FFMPEG_BIN, tem_audio
+
+
+class SharedPCM:
+    """
+    Trilha de áudio extraída UMA vez por episódio (um único decode do ffmpeg
+    com duas saídas) e exposta como np.memmap:
+    - analise: float32 mono 16 kHz (Whisper e análise de energia)
+    - saida:   int16 estéreo 44.1 kHz (áudio dos cortes, com qualidade de entrega)
+    As fatias são views do arquivo, sem cópia e sem novo decode.
+    Os arquivos ficam no cache local, endereçados pelo hash da mídia, com
+    despejo LRU quando passam de `max_bytes` (3 h de episódio ocupam ~2,6 GB).
+    Vídeo sem áudio gera trilhas vazias (e os cortes saem mudos).
+    """
+
+    SR_ANALISE = 16000
+    SR_SAIDA = 44100
+
+    def __init__(self, video_path, diretorio=None, max_bytes=6 * 1024**3):
+        self.video_path = video_path
+        diretorio = diretorio or os.path.join(CACHE_DIR, "pcm")
+        os.makedirs(diretorio, exist_ok=True)
+
+        chave = hash_arquivo(video_path)
+        self.caminho_analise = os.path.join(diretorio, f"{chave}_16k_mono.f32")
+        self.caminho_saida = os.path.join(diretorio, f"{chave}_44k_stereo.s16")
+
+        if os.path.exists(self.caminho_analise) and os.path.exists(self.caminho_saida):
+            for caminho in (self.caminho_analise, self.caminho_saida):
+                os.utime(caminho)  # Em uso: vai para o fim da fila de despejo
+        else:
+            self._extrair()
+            despejar_lru(diretorio, max_bytes, (".f32", ".s16"),
+                         manter=(self.caminho_analise, self.caminho_saida))
+        self._abrir()
+
+    def _extrair(self):
+        print("🔈 Extraindo a trilha de áudio (uma única vez)...")
+        temp_analise = f"{self.caminho_analise}.{os.getpid()}.tmp"
+        temp_saida = f"{self.caminho_saida}.{os.getpid()}.tmp"
+        if not tem_audio(self.video_path):
+            print("🔇 Vídeo sem áudio: trilhas vazias")
+            for caminho in (self.caminho_analise, self.caminho_saida):
+                open(caminho, "wb").close()
+            return
+        cmd = [
+            FFMPEG_BIN, "-y", "-v", "error", "-nostdin",
+            "-i", self.video_path,
+            "-map", "0:a:0", "-ac", "1", "-ar", str(self.SR_ANALISE), "-f", "f32le", temp_analise,
+            "-map", "0:a:0", "-ac", "2", "-ar", str(self.SR_SAIDA), "-f", "s16le", temp_saida,
+        ]
+        try:
+            subprocess.run(cmd, check=True, stdin=subprocess.DEVNULL)
+            os.replace(temp_analise, self.caminho_analise)
+            os.replace(temp_saida, self.caminho_saida)
+        finally:
+            for temp in (temp_analise, temp_saida):
+                if os.path.exists(temp):
+                    os.remove(temp)
+
+    def _abrir(self):
+        # 'c' (copy-on-write): páginas sob demanda e arrays graváveis para o torch
+        self.analise = _memmap(self.caminho_analise, np.float32, mode='c')
+        self.saida = _memmap(self.caminho_saida, np.int16, mode='r').reshape(-1, 2)
+        self.duracao = len(self.analise) / self.SR_ANALISE
+
+    # Só os caminhos vão para os processos filhos (não o conteúdo do memmap)
+    def __getstate__(self):
+        return {
+            'video_path': self.video_path,
+            'caminho_analise': self.caminho_analise,
+            'caminho_saida': self.caminho_saida,
+        }
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._abrir()
+
+    def fatia_analise(self, inicio, fim):
+        a = max(0, int(inicio * self.SR_ANALISE))
+        return self.analise[a:max(a, int(fim * self.SR_ANALISE))]
+
+    def fatia_saida(self, inicio, fim):
+        a = max(0, int(inicio * self.SR_SAIDA))
+        return self.saida[a:max(a, int(fim * self.SR_SAIDA))]
+
+    def fatia_saida_float(self, inicio, fim):
+        """Fatia de saída em float32 [-1, 1) (moviepy), convertida direto do memmap sem float64"""
+        return np.multiply(self.fatia_saida(inicio, fim), np.float32(1 / 32768), dtype=np.float32)
+
+    @property
+    def tem_audio(self):
+        return len(self.saida) > 0
+
+    def entrada_ffmpeg(self):
+        """Argumentos para o ffmpeg ler a trilha de saída crua (com seek barato)"""
+        if not self.tem_audio:
+            return None, self.video_path  # Sem trilha: o '1:a:0?' do writer some e o corte sai mudo
+        return ["-f", "s16le", "-ar", str(self.SR_SAIDA), "-ac", "2"], self.caminho_saida
+
+
+def _memmap(caminho, dtype, mode):
+    if os.path.getsize(caminho) == 0:
+        return np.zeros(0, dtype=dtype)  # Vídeo sem áudio
+    return np.memmap(caminho, dtype=dtype, mode=mode)
+
+
+def energia_quadros(audio, sr, quadro=0.1, bloco_segundos=60):
+    """
+    Energia RMS (dB) por quadro de `quadro` segundos, calculada em blocos
+    para não materializar o episódio inteiro na memória.
+    """
+    hop = int(sr * quadro)
+    n_quadros = len(audio) // hop
+    energia = np.empty(n_quadros, dtype=np.float32)
+    passo = max(1, int(bloco_segundos / quadro))
+    for k in range(0, n_quadros, passo):
+        q = min(passo, n_quadros - k)
+        bloco = np.asarray(audio[k * hop:(k + q) * hop], dtype=np.float32).reshape(q, hop)
+        energia[k:k + q] = 10 * np.log10(np.mean(np.square(bloco), axis=1) + 1e-10)
+    return energia
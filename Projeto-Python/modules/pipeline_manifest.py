@@ -0,0 +1,77 @@
+import json
+import os
+import time
+
+VERSAO = 1  # Muda quando o render muda de um jeito que invalida os cortes já prontos
+
+
+class PipelineManifest:
+    """
+    Estado das etapas de um episódio na pasta de saída, com as entradas de
+    cada etapa resumidas num hash (disk_cache.hash_dados):
+    - manifesto.json guarda as etapas do episódio (ex: lista de momentos);
+      se a chave bate, o valor salvo é reaproveitado sem recalcular;
+    - cada corte pronto ganha um etapas.json na própria pasta, com a chave
+      do render (janela, trajetória, legendas, IA, perfil de saída). Um
+      corte só é refeito se essa chave mudar ou se o vídeo sumir.
+    Transcrição, rostos, trajetórias e IA têm seus próprios caches em
+    CACHE_DIR; aqui fica o que é específico da pasta de saída. Como cada
+    corte escreve só o próprio arquivo, os workers de renderização não
+    disputam o manifesto, e uma execução interrompida retoma dos cortes
+    que faltam.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.caminho = os.path.join(output_dir, "manifesto.json")
+
+    def _ler(self, caminho):
+        if not os.path.exists(caminho):
+            return {}
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}  # Corrompido (execução interrompida): tudo é refeito
+
+    def _gravar(self, caminho, dados):
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        temp = f"{caminho}.{os.getpid()}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2, default=float)
+        os.replace(temp, caminho)  # Escrita atômica
+
+    def etapa(self, nome, chave, construir):
+        """Valor da etapa `nome` (JSON) para as entradas `chave`; só calcula se mudou"""
+        etapas = self._ler(self.caminho).get('etapas', {})
+        salvo = etapas.get(nome)
+        if salvo is not None and salvo.get('chave') == chave:
+            print(f"♻️ Etapa '{nome}' reaproveitada do manifesto")
+            return salvo['valor']
+
+        valor = construir()
+        dados = self._ler(self.caminho)  # Relê: outra etapa pode ter sido gravada
+        dados.setdefault('etapas', {})[nome] = {'chave': chave, 'valor': valor, 'criado': time.time()}
+        self._gravar(self.caminho, dados)
+        return valor
+
+    def _carimbo(self, corte):
+        return os.path.join(corte['pasta_corte'], "etapas.json")
+
+    def corte_pronto(self, corte):
+        """True se o vídeo e a postagem do corte já existem com a mesma chave"""
+        carimbo = self._ler(self._carimbo(corte))
+        return (
+            carimbo.get('chave') == corte['chave']
+            and os.path.exists(corte['caminho_video'])
+            and os.path.exists(os.path.join(corte['pasta_corte'], "postagem.txt"))
+        )
+
+    def registrar_corte(self, corte):
+        self._gravar(self._carimbo(corte), {
+            'chave': corte['chave'],
+            'video': os.path.basename(corte['caminho_video']),
+            'inicio': corte['start_t'],
+            'fim': corte['end_t'],
+            'criado': time.time(),
+        })
@@ -0,0 +1,66 @@
+import cv2
+import numpy as np
+
+
+class ShotChangeDetector:
+    """
+    Métrica barata de mudança entre amostras do tracking, numa miniatura
+    em tons de cinza (64x36):
+    - corte de câmera: distância de Bhattacharyya entre histogramas da
+      amostra atual e da anterior;
+    - movimento: diferença média de pixels em relação à última amostra
+      que passou pela detecção (movimento lento também acumula).
+    Em trechos estáticos a detecção (DNN/Haar) é pulada, mas nunca por mais
+    de `max_intervalo` segundos seguidos.
+    """
+
+    CORTE = 'corte'
+    MOVIMENTO = 'movimento'
+    FORCADO = 'forcado'
+    ESTATICO = 'estatico'
+
+    def __init__(self, limiar_corte=0.3, limiar_movimento=6.0, max_intervalo=2.0, tamanho=(64, 36)):
+        self.limiar_corte = limiar_corte
+        self.limiar_movimento = limiar_movimento
+        self.max_intervalo = max_intervalo
+        self.tamanho = tamanho
+        self.reset()
+
+    def reset(self):
+        self._anterior_hist = None
+        self._referencia = None  # Miniatura da última amostra detectada
+        self._t_referencia = None
+        self.detectados = 0
+        self.pulados = 0
+        self.cortes = 0
+
+    def classificar(self, frame, t):
+        """Classifica a amostra; qualquer resultado diferente de ESTATICO pede detecção"""
+        cinza = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+        mini = cv2.resize(cinza, self.tamanho, interpolation=cv2.INTER_AREA)
+        hist = cv2.calcHist([mini], [0], None, [32], [0, 256])
+        cv2.normalize(hist, hist)
+
+        anterior, self._anterior_hist = self._anterior_hist, hist
+        if anterior is None:
+            tipo = self.CORTE  # Primeira amostra: começa um plano
+        elif cv2.compareHist(anterior, hist, cv2.HISTCMP_BHATTACHARYYA) > self.limiar_corte:
+            tipo = self.CORTE
+            self.cortes += 1
+        elif np.mean(cv2.absdiff(mini, self._referencia)) > self.limiar_movimento:
+            tipo = self.MOVIMENTO
+        elif t - self._t_referencia >= self.max_intervalo:
+            tipo = self.FORCADO
+        else:
+            self.pulados += 1
+            return self.ESTATICO
+
+        self.detectados += 1
+        self._referencia = mini
+        self._t_referencia = t
+        return tipo
+
+    def resumo(self):
+        total = self.detectados + self.pulados
+        return (f"{self.detectados} detecções executadas, {self.pulados} puladas "
+                f"({100 * self.pulados / max(total, 1):.0f}%), {self.cortes} cortes de câmera")
@@ -0,0 +1,120 @@
+import bisect
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+FONTE_PADRAO = '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf'
+
+
+class CaptionTrack:
+    """
+    Legendas de um clipe num índice de intervalos ordenado por início.
+    Busca das legendas ativas em O(log n) por frame.
+    """
+
+    def __init__(self, legendas):
+        # legendas: lista de (inicio, fim, texto) em segundos relativos ao clipe
+        legendas = sorted((s, e, txt) for s, e, txt in legendas if e > s)
+        self.inicios = [s for s, _, _ in legendas]
+        self.fins = np.array([e for _, e, _ in legendas], dtype=np.float64)
+        self.textos = [txt for _, _, txt in legendas]
+        # Maior fim até cada posição: permite parar a varredura para trás cedo
+        self._fim_max = np.maximum.accumulate(self.fins) if len(self.fins) else self.fins
+
+    def __len__(self):
+        return len(self.textos)
+
+    def ativas(self, t):
+        ativas = []
+        j = bisect.bisect_right(self.inicios, t) - 1
+        while j >= 0 and self._fim_max[j] > t:
+            if self.fins[j] > t:
+                ativas.append(self.textos[j])
+            j -= 1
+        ativas.reverse()
+        return ativas
+
+
+class SubtitleRenderer:
+    """
+    Compositor de legendas direto no array do frame.
+    Cada texto distinto é rasterizado UMA vez (fonte + contorno) num cache
+    RGBA com despejo LRU; por frame só fazemos o alpha-blend das legendas ativas.
+    """
+
+    def __init__(self, fontsize=80, color=(255, 255, 0), stroke_color=(0, 0, 0),
+                 stroke_width=3, font=FONTE_PADRAO, max_width=900, y=1400,
+                 escala=1.0, max_cache=512):
+        # Tudo o que muda o visual das legendas (entra na chave dos cortes prontos)
+        self.estilo = {'fontsize': fontsize, 'color': color, 'stroke_color': stroke_color,
+                       'stroke_width': stroke_width, 'font': font, 'max_width': max_width,
+                       'y': y, 'escala': escala}
+        self.color = color
+        self.stroke_color = stroke_color
+        self.stroke_width = max(1, round(stroke_width * escala))
+        self.max_width = int(max_width * escala)
+        self.y = int(y * escala)
+        self.max_cache = max_cache
+        self._cache = OrderedDict()
+        try:
+            self.font = ImageFont.truetype(font, max(1, round(fontsize * escala)))
+        except OSError:
+            print(f"⚠️ Fonte '{font}' não encontrada, usando a padrão")
+            self.font = ImageFont.load_default()
+
+    def _rasterizar(self, texto):
+        txt = f" {texto.upper()} "
+        medidor = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+        x0, y0, x1, y1 = medidor.textbbox((0, 0), txt, font=self.font, stroke_width=self.stroke_width)
+        img = Image.new('RGBA', (max(1, x1 - x0), max(1, y1 - y0)), (0, 0, 0, 0))
+        ImageDraw.Draw(img).text(
+            (-x0, -y0), txt,
+            font=self.font,
+            fill=self.color,
+            stroke_width=self.stroke_width,
+            stroke_fill=self.stroke_color
+        )
+        if img.width > self.max_width:
+            img = img.resize((self.max_width, max(1, round(img.height * self.max_width / img.width))), Image.LANCZOS)
+
+        rgba = np.asarray(img)
+        alpha = rgba[..., 3:4].astype(np.uint16)
+        # Guardamos já pré-multiplicado para o blend ser só soma + multiplicação
+        premult = rgba[..., :3].astype(np.uint16) * alpha
+        return premult, 255 - alpha
+
+    def _glifo(self, texto):
+        glifo = self._cache.get(texto)
+        if glifo is not None:
+            self._cache.move_to_end(texto)
+            return glifo
+        glifo = self._rasterizar(texto)
+        self._cache[texto] = glifo
+        if len(self._cache) > self.max_cache:
+            self._cache.popitem(last=False)
+        return glifo
+
+    def compor(self, frame, faixa, t):
+        """Aplica as legendas ativas no instante t sobre o frame (in-place)"""
+        for texto in faixa.ativas(t):
+            premult, inv_alpha = self._glifo(texto)
+            gh, gw = inv_alpha.shape[:2]
+            fh, fw = frame.shape[:2]
+
+            x0 = (fw - gw) // 2
+            y0 = self.y
+            # Recorta o glifo para caber no frame
+            gx0, gy0 = max(0, -x0), max(0, -y0)
+            gx1, gy1 = min(gw, fw - x0), min(gh, fh - y0)
+            if gx1 <= gx0 or gy1 <= gy0:
+                continue
+
+            regiao = frame[y0 + gy0:y0 + gy1, x0 + gx0:x0 + gx1]
+            misturado = regiao.astype(np.uint16)
+            misturado *= inv_alpha[gy0:gy1, gx0:gx1]
+            misturado += premult[gy0:gy1, gx0:gx1]
+            misturado += 127
+            misturado //= 255
+            regiao[:] = misturado
+        return frame
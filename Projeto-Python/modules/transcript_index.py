@@ -0,0 +1,57 @@
+import numpy as np
+
+
+class TranscriptIndex:
+    """
+    Índice da transcrição construído UMA vez por episódio.
+    Palavras em arrays planos (início, fim, segmento) ordenados por início,
+    com os textos concatenados numa string e acessados por offsets.
+    Buscar as palavras de uma janela custa O(log n + k) em vez de varrer
+    todos os segmentos a cada corte.
+    """
+
+    def __init__(self, transcription):
+        segments = transcription.get('segments', [])
+
+        # Segmentos (usados pela detecção de momentos)
+        self.seg_inicios = np.array([seg['start'] for seg in segments], dtype=np.float64)
+        self.seg_fins = np.array([seg['end'] for seg in segments], dtype=np.float64)
+        self.seg_textos = [seg.get('text', '') for seg in segments]
+
+        palavras = [
+            (w['start'], w['end'], seg_idx, w['word'])
+            for seg_idx, seg in enumerate(segments)
+            for w in seg.get('words', [])
+        ]
+        palavras.sort(key=lambda p: p[0])  # Whisper já entrega em ordem; garante
+
+        self.inicios = np.array([p[0] for p in palavras], dtype=np.float64)
+        self.fins = np.array([p[1] for p in palavras], dtype=np.float64)
+        self.segmento = np.array([p[2] for p in palavras], dtype=np.int32)
+
+        textos = [p[3] for p in palavras]
+        self.texto = "".join(textos)
+        self.offsets = np.zeros(len(textos) + 1, dtype=np.int64)
+        np.cumsum([len(t) for t in textos], out=self.offsets[1:])
+
+    def __len__(self):
+        return len(self.inicios)
+
+    def intervalo(self, start_t, end_t):
+        """Índices das palavras inteiramente dentro de [start_t, end_t]"""
+        lo = int(np.searchsorted(self.inicios, start_t, side='left'))
+        hi = int(np.searchsorted(self.inicios, end_t, side='right'))
+        return np.arange(lo, hi)[self.fins[lo:hi] <= end_t]
+
+    def palavra(self, k):
+        return self.texto[self.offsets[k]:self.offsets[k + 1]]
+
+    def palavras(self, start_t, end_t):
+        """Palavras da janela no mesmo formato dos 'words' do Whisper"""
+        return [
+            {'word': self.palavra(k), 'start': float(self.inicios[k]), 'end': float(self.fins[k])}
+            for k in self.intervalo(start_t, end_t)
+        ]
+
+    def textos(self, start_t, end_t):
+        return [self.palavra(k).strip() for k in self.intervalo(start_t, end_t)]
@@ -0,0 +1,29 @@
+import os
+
+from modules.disk_cache import CACHE_DIR, DiskCache, hash_arquivo, hash_dados
+
+
+class TranscriptionCache(DiskCache):
+    """
+    Cache das transcrições do Whisper, endereçado pelo conteúdo da mídia.
+    A chave combina o hash do arquivo com modelo, idioma e opções do transcribe,
+    então re-renderizar um episódio já transcrito não carrega o Whisper.
+    """
+
+    def __init__(self, diretorio=None, max_bytes=2 * 1024**3):
+        super().__init__(diretorio or os.path.join(CACHE_DIR, "transcricoes"), max_bytes)
+
+    def chave(self, video_path, model_size, language, opcoes):
+        return hash_dados(hash_arquivo(video_path), model_size, language, opcoes)
+
+    def buscar(self, video_path, model_size, language=None, opcoes=None):
+        return self.get(self.chave(video_path, model_size, language, opcoes or {}))
+
+    def salvar(self, video_path, model_size, language, opcoes, resultado):
+        # Guarda só o que o pipeline usa (texto, idioma, segmentos com palavras)
+        valor = {
+            "text": resultado.get("text", ""),
+            "language": resultado.get("language", language),
+            "segments": resultado.get("segments", []),
+        }
+        self.put(self.chave(video_path, model_size, language, opcoes or {}), valor)
@@ -0,0 +1,112 @@
+import numpy as np
+
+from modules.pcm_audio import energia_quadros
+
+
+class EnergyVAD:
+    """
+    Detector de fala por energia, só com NumPy:
+    - RMS em dB por quadro de 30 ms,
+    - limiar adaptativo entre o piso de ruído e o nível típico de fala,
+    - pausas curtas (< min_silencio) não quebram a fala (hangover),
+    - trechos muito curtos são descartados e cada região ganha uma margem.
+    Serve para tirar vinhetas silenciosas, intervalos e ar morto do Whisper.
+    """
+
+    def __init__(self, quadro=0.03, margem=0.3, min_fala=0.25, min_silencio=0.8, fator=0.3):
+        self.quadro = quadro
+        self.margem = margem
+        self.min_fala = min_fala
+        self.min_silencio = min_silencio
+        self.fator = fator
+
+    def regioes(self, audio, sr):
+        """Lista de (inicio, fim) em segundos com fala"""
+        duracao = len(audio) / sr
+        energia = energia_quadros(audio, sr, self.quadro)
+        if len(energia) == 0:
+            return []
+
+        piso = np.percentile(energia, 10)
+        topo = np.percentile(energia, 95)
+        if topo - piso < 6:
+            return [(0.0, duracao)]  # Dinâmica plana: não dá para separar, manda tudo
+        fala = energia > piso + self.fator * (topo - piso)
+
+        # Bordas das sequências de quadros com fala
+        bordas = np.diff(np.concatenate(([0], fala.astype(np.int8), [0])))
+        inicios = np.flatnonzero(bordas == 1) * self.quadro
+        fins = np.flatnonzero(bordas == -1) * self.quadro
+        if len(inicios) == 0:
+            return []
+
+        # Hangover: junta regiões separadas por pausas curtas
+        novo = np.flatnonzero(np.concatenate(([True], inicios[1:] - fins[:-1] >= self.min_silencio)))
+        ultimo = np.concatenate((novo[1:] - 1, [len(fins) - 1]))
+        inicios, fins = inicios[novo], fins[ultimo]
+
+        longas = fins - inicios >= self.min_fala
+        inicios = np.maximum(inicios[longas] - self.margem, 0.0)
+        fins = np.minimum(fins[longas] + self.margem, duracao)
+
+        # A margem pode fazer regiões vizinhas se encostarem
+        regioes = []
+        for a, b in zip(inicios, fins):
+            if regioes and a <= regioes[-1][1]:
+                regioes[-1][1] = max(regioes[-1][1], b)
+            else:
+                regioes.append([a, b])
+        return [(float(a), float(b)) for a, b in regioes]
+
+
+class TimeMap:
+    """
+    Áudio compactado (só as regiões de fala, separadas por um respiro de
+    silêncio) e o mapa de volta para a linha do tempo original.
+    """
+
+    def __init__(self, regioes, respiro=0.2):
+        self.regioes = regioes
+        self.respiro = respiro
+        duracoes = np.array([b - a for a, b in regioes], dtype=np.float64)
+        self.origem = np.array([a for a, _ in regioes], dtype=np.float64)
+        self.duracoes = duracoes
+        self.compacto = np.concatenate(([0.0], np.cumsum(duracoes + respiro)[:-1])) if len(regioes) else np.zeros(0)
+
+    def compactar(self, audio, sr):
+        partes = []
+        silencio = np.zeros(int(self.respiro * sr), dtype=np.float32)
+        for a, b in self.regioes:
+            partes.append(np.asarray(audio[int(a * sr):int(b * sr)], dtype=np.float32))
+            partes.append(silencio)
+        return np.concatenate(partes) if partes else np.zeros(0, dtype=np.float32)
+
+    def original(self, t):
+        """Tempo no áudio compactado -> tempo no áudio original"""
+        k = max(0, int(np.searchsorted(self.compacto, t, side='right')) - 1)
+        return float(self.origem[k] + min(max(t - self.compacto[k], 0.0), self.duracoes[k]))
+
+    def remapear(self, resultado):
+        """Leva os tempos do resultado do Whisper para a linha do tempo original"""
+        for seg in resultado.get('segments', []):
+            seg['start'] = self.original(seg['start'])
+            seg['end'] = self.original(seg['end'])
+            for w in seg.get('words', []):
+                w['start'] = self.original(w['start'])
+                w['end'] = self.original(w['end'])
+        return resultado
+
+
+def recortar_regioes(regioes, inicio, fim):
+    """Regiões de fala dentro de [inicio, fim), relativas ao início do trecho"""
+    return [(max(a, inicio) - inicio, min(b, fim) - inicio) for a, b in regioes if b > inicio and a < fim]
+
+
+def transcrever_regioes(model, audio, sr, regioes, **opcoes):
+    """Transcreve só as regiões de fala (ou tudo, se regioes for None)"""
+    if regioes is None:
+        return model.transcribe(np.ascontiguousarray(audio), **opcoes)
+    if not regioes:
+        return {'text': '', 'segments': [], 'language': opcoes.get('language')}
+    mapa = TimeMap(regioes)
+    return mapa.remapear(model.transcribe(mapa.compactar(audio, sr), **opcoes))
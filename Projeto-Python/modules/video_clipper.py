@@ -4,21 +4,33 @@ import json
 import argparse
 import cv2
 import numpy as np
-import whisper
 from groq import Groq
-from moviepy import VideoFileClip, TextClip, CompositeVideoClip, concatenate_videoclips
+from moviepy import VideoFileClip
 from tqdm import tqdm
 
+from modules.audio_processor import AudioProcessor
+from modules.crop_path import CropPath
+from modules.frame_sampler import SequentialFrameSampler
+from modules.llm_cache import LLMCache
+from modules.subtitle_renderer import CaptionTrack, SubtitleRenderer
+from modules.transcript_index import TranscriptIndex
+
 # --- CONFIGURAÇÃO ---
 # Substitua pela sua chave real do Groq Cloud
 GROQ_API_KEY = "."
 
 class VideoClipper:
-    def __init__(self):
+    def __init__(self, use_cache=True, tamanho_saida=(1080, 1920)):
         # Carrega o detector de rostos do OpenCV
         self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
         # Inicializa o cliente Groq
         self.client = Groq(api_key=GROQ_API_KEY)
+        # Cache persistente das respostas (re-render sem rede)
+        self.llm_cache = LLMCache() if use_cache else None
+        # Resolução do vídeo vertical; as legendas acompanham a escala (layout de 1080x1920)
+        self.tamanho_saida = tamanho_saida
+        # Legendas desenhadas direto no frame (glifos em cache, sem um TextClip por palavra)
+        self.subtitles = SubtitleRenderer(fontsize=75, max_width=950, y=1450, escala=tamanho_saida[0] / 1080)
 
     def processar_com_ia(self, lista_palavras):
         """Traduz do inglês ou revisa o português usando Groq (Llama 3)."""
@@ -44,26 +56,39 @@ class VideoClipper:
             "tags": "#tag1 #tag2 #tag3 #tag4 #tag5 #tag6"
         }}
         """
+        mensagens = [
+            {"role": "system", "content": "Você é um assistente que traduz vídeos e responde apenas em JSON puro."},
+            {"role": "user", "content": prompt}
+        ]
+        modelo = "llama-3.3-70b-versatile"
+        formato = {"type": "json_object"}
+
+        data = self.llm_cache.buscar(modelo, mensagens, formato) if self.llm_cache is not None else None
+        if data is not None:
+            # Cache hit: sem rede e sem a pausa de rate limit
+            return data["conteudo"], data["titulo"], data["tags"]
+
         try:
             # Groq é ultra rápido, o sleep de 0.5s é apenas para segurança de rate limit
             time.sleep(0.5) 
             
             chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": "Você é um assistente que traduz vídeos e responde apenas em JSON puro."},
-                    {"role": "user", "content": prompt}
-                ],
-                model="llama-3.3-70b-versatile",
-                response_format={"type": "json_object"}
+                messages=mensagens,
+                model=modelo,
+                response_format=formato
             )
             
             res_text = chat_completion.choices[0].message.content
             data = json.loads(res_text)
             
-            conteudo = data.get("conteudo", [])
-            titulo = data.get("titulo", "MOMENTO ÉPICO! 🔥")
-            tags = data.get("tags", "#viral #cortes")
+            completa = all(data.get(c) for c in ("conteudo", "titulo", "tags"))
+            conteudo = data.get("conteudo") or []
+            titulo = data.get("titulo") or "MOMENTO ÉPICO! 🔥"
+            tags = data.get("tags") or "#viral #cortes"
             
+            # Só respostas completas vão para o cache; campo faltando usa o padrão só desta vez
+            if completa and self.llm_cache is not None:
+                self.llm_cache.salvar(modelo, mensagens, formato, {"conteudo": conteudo, "titulo": titulo, "tags": tags})
             return conteudo, titulo, tags
         except Exception as e:
             print(f"⚠️ Erro na IA (Groq): {e}")
@@ -77,36 +102,32 @@ class VideoClipper:
         valid_faces = [x + w/2 for (x, y, w, h) in faces if y < (frame.shape[0] * 0.45)]
         return valid_faces[0] if valid_faces else None
 
-    def create_subtitle(self, word, start, duration):
+    @staticmethod
+    def trajetoria(amostras_x, duracao, fps, tamanho_origem, tamanho_saida=(1080, 1920)):
         """
-        Cria legendas inteligentes:
-        1. Usa 'label' para precisão máxima (evita cortes no topo/base).
-        2. Adiciona espaços laterais para garantir que o contorno não suma.
-        3. Mantém a margem de segurança.
+        Recorte 9:16 de cada frame a partir das posições por segundo: cada
+        segundo usa o último rosto visto (ou o centro), como antes, mas num
+        único array indexado pelo número do frame.
         """
-        txt_clip = TextClip(
-            text=f" {word.upper()} ", # Espaços extras ajudam na renderização
-            font_size=75, 
-            color='yellow', 
-            stroke_color='black', 
-            stroke_width=3, 
-            method='label', # MUDADO: 'label' é melhor que 'caption' para evitar cortes
-            font='/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
-            text_align='center',
-            margin=(25, 25) # Margem aumentada para garantir o respiro
-        )
-
-        # Se a palavra for muito longa para a tela vertical, redimensiona
-        if txt_clip.w > 950:
-            txt_clip = txt_clip.resized(width=950)
-
-        return txt_clip.with_position(('center', 1450)).with_start(start).with_duration(duration)
+        w, h = tamanho_origem
+        por_segundo = np.empty(max(1, int(np.ceil(duracao))))
+        last_x = w / 2
+        for k in range(len(por_segundo)):
+            new_x = amostras_x[k] if k < len(amostras_x) else None
+            if new_x: last_x = new_x
+            por_segundo[k] = last_x
+
+        n_frames = max(1, int(np.ceil(duracao * fps)))
+        segundo = np.minimum((np.arange(n_frames) / fps).astype(int), len(por_segundo) - 1)
+        return CropPath.from_centers(por_segundo[segundo], fps, tamanho_origem, tamanho_saida)
 
     def create_all_clips(self, video_path, transcription, moments, output_dir):
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
         video = VideoFileClip(video_path)
+        # Índice das palavras por tempo: construído uma vez, consultado por bisseção
+        indice = TranscriptIndex(transcription)
         
         for i, m in enumerate(tqdm(moments, desc="Cortando momentos"), 1):
             is_longo = (i % 4 == 0) 
@@ -122,26 +143,20 @@ class VideoClipper:
             sub = video.subclipped(start_t, end_t)
             
             # --- CÂMERA DINÂMICA ---
-            segments = []
-            last_x = sub.w / 2
-            for t in np.arange(0, sub.duration, 1.0):
-                frame = sub.get_frame(t)
+            # Uma amostra por segundo, decodificada em sequência (sem seek por frame)
+            sampler = SequentialFrameSampler(video_path, start_t, end_t, 1.0, (video.w, video.h))
+            amostras_x = []
+            for t, frame in sampler:
                 new_x = self.get_active_face_x(frame)
-                if new_x: last_x = new_x
-                
-                target_w = int(sub.h * (9/16))
-                x1 = int(max(0, min(last_x - target_w/2, sub.w - target_w)))
-                seg = sub.subclipped(t, min(t + 1.0, sub.duration)).cropped(x1=x1, x2=x1+target_w, y1=0, y2=sub.h)
-                segments.append(seg.resized(width=1080, height=1920))
+                amostras_x.append(new_x * sampler.escala if new_x else None)
 
-            sub_v = concatenate_videoclips(segments)
+            # Um único transform por corte: O(1) por frame e um buffer de saída
+            # fixo, em vez de um subclip+crop+resize por segundo concatenados
+            fps = sub.fps or 30
+            crop_path = self.trajetoria(amostras_x, sub.duration, fps, (sub.w, sub.h), self.tamanho_saida)
             
             # --- IA E TRADUÇÃO VIA GROQ ---
-            palavras_trecho = []
-            for segment in transcription['segments']:
-                for w_data in segment.get('words', []):
-                    if w_data['start'] >= start_t and w_data['end'] <= end_t:
-                        palavras_trecho.append(w_data)
+            palavras_trecho = indice.palavras(start_t, end_t)
 
             lista_txt = [w['word'].strip() for w in palavras_trecho]
             
@@ -158,22 +173,29 @@ class VideoClipper:
             else:
                 texto_final = texto_traduzido
 
-            subs_clips = []
+            legendas = []
             for idx, w in enumerate(palavras_trecho):
                 if idx >= len(texto_final): break
                 
                 s = w['start'] - start_t
                 d = w['end'] - w['start']
                 if d > 0:
-                    subs_clips.append(self.create_subtitle(texto_final[idx], s, d))
+                    legendas.append((s, s + d, texto_final[idx]))
+            faixa = CaptionTrack(legendas)
             
             # --- RENDERIZAÇÃO ---
-            final = CompositeVideoClip([sub_v] + subs_clips)
-            final.write_videofile(os.path.join(pasta_corte, f"video_{i:02d}.mp4"), codec='libx264', audio_codec='aac', threads=4)
+            # Memória constante: o frame da fonte, o buffer do recorte e o cache de glifos
+            def quadro(get_frame, t, crop_path=crop_path, faixa=faixa):
+                return self.subtitles.compor(crop_path.recortar(get_frame(t), t), faixa, t)
+            
+            final = sub.transform(quadro)
+            final.write_videofile(os.path.join(pasta_corte, f"video_{i:02d}.mp4"), codec='libx264', audio_codec='aac', threads=4, fps=fps)
             
             with open(os.path.join(pasta_corte, "postagem.txt"), "w", encoding="utf-8") as f:
                 f.write(f"TITULO: {titulo_ia}\nTAGS: {tags_ia}")
 
+        if self.llm_cache is not None:
+            print(f"💾 Cache da IA: {self.llm_cache.resumo()}")
         video.close()
 
 # --- BLOCO PRINCIPAL ---
@@ -182,15 +204,15 @@ if __name__ == "__main__":
     parser.add_argument("video", help="Caminho do vídeo")
     parser.add_argument("--max", type=int, default=11)
     parser.add_argument("--model", default="small")
+    parser.add_argument("--sem-cache", action="store_true", help="Ignora os caches (transcrição e IA)")
     args = parser.parse_args()
 
     if os.path.exists(args.video):
         print(f"🚀 Iniciando Processamento: {args.video}")
-        clipper = VideoClipper()
+        clipper = VideoClipper(use_cache=not args.sem_cache)
         
-        print(f"🎙️ Carregando Whisper e Transcrevendo...")
-        model_whisper = whisper.load_model(args.model)
-        result = model_whisper.transcribe(args.video, word_timestamps=True, verbose=True)
+        print(f"🎙️ Transcrevendo com Whisper...")
+        result = AudioProcessor(model_size=args.model, use_cache=not args.sem_cache, verbose=True).process_video(args.video)
         
         v_meta = VideoFileClip(args.video)
         total = v_meta.duration
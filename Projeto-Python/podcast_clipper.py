@@ -2,22 +2,46 @@ import os
 import time
 import json
 import argparse
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
 import cv2
 import numpy as np
-import whisper
 from groq import Groq
 from moviepy.editor import (
     VideoFileClip,
-    TextClip,
-    CompositeVideoClip,
     concatenate_videoclips
 )
+from moviepy.audio.AudioClip import AudioArrayClip
 import moviepy.audio.fx.all as afx
 
 from tqdm import tqdm
 
+from modules.audio_processor import AudioProcessor
+from modules.audio_scorer import AudioScorer
+from modules.camera_solver import CameraPathSolver
+from modules.clip_daemon import PORTA_PADRAO, ClipDaemon, DaemonClient
+from modules.crop_path import CropPath
+from modules.disk_cache import CACHE_DIR, ArrayCache, hash_arquivo, hash_dados
+from modules.face_index import VERSAO as VERSAO_ROSTOS, FaceTrack
+from modules.ffmpeg_writer import FFmpegPipeWriter, caminho_parcial
+from modules.frame_sampler import SequentialFrameSampler
+from modules.live_follower import LiveFollower
+from modules.llm_cache import LLMCache
+from modules.llm_stage import LLMStage
+from modules.pcm_audio import SharedPCM
+from modules.pipeline_manifest import VERSAO as VERSAO_RENDER, PipelineManifest
+from modules.moment_detector import MomentDetector
+from modules.subtitle_renderer import CaptionTrack, SubtitleRenderer
+from modules.transcript_index import TranscriptIndex
+
 # --- CONFIGURAÇÃO ---
 GROQ_API_KEY = "."
+MODELO_IA = "llama-3.3-70b-versatile"
+FORMATO_IA = {"type": "json_object"}
+
+# Prévia em baixa resolução: mesma trajetória e legendas, encode barato
+PERFIL_FINAL = {'tamanho': (1080, 1920), 'fps': 30, 'preset': 'medium', 'crf': None, 'pasta': ''}
+PERFIL_PREVIEW = {'tamanho': (270, 480), 'fps': 15, 'preset': 'ultrafast', 'crf': 30, 'pasta': 'preview'}
 
 
 class RobustFaceTracker:
@@ -55,11 +79,15 @@ class RobustFaceTracker:
             self.dnn_net = None
             self.use_dnn = False
         
-        # Histórico de posições (para suavização temporal)
-        self.position_history = []
-        self.max_history = 15  # Aumentado para um movimento de câmera muito mais suave (estilo Gimbal)
+        # Modo detectar-e-seguir (track_face)
+        self.redeteccao = 10  # Amostras seguidas por template antes de re-detectar na ROI
+        self.limiar_template = 0.6  # Abaixo disso o template "perdeu" o rosto
+        self.contagem = {'completa': 0, 'roi': 0, 'template': 0}
+        self._caixa = None
+        self._template = None
+        self._desde_deteccao = 0
         
-    def detect_face_dnn(self, frame, confidence_threshold=0.5):
+    def detect_face_dnn(self, frame, confidence_threshold=0.5, metade_superior=True):
         """Detecção com DNN - MAIS PRECISO"""
         if not self.use_dnn or self.dnn_net is None:
             return None
@@ -88,7 +116,7 @@ class RobustFaceTracker:
                     
                     # Valida se o rosto está na parte superior do frame
                     center_y = (y1 + y2) / 2
-                    if center_y < h * 0.5:  # Rosto na metade superior
+                    if center_y < h * 0.5 or not metade_superior:  # Rosto na metade superior
                         best_face = {
                             'x': (x1 + x2) / 2,
                             'y': center_y,
@@ -103,7 +131,64 @@ class RobustFaceTracker:
             print(f"⚠️ Erro no DNN: {e}")
             return None
     
-    def detect_face_haar(self, frame):
+    def detect_faces_batch(self, frames, confidence_threshold=0.5):
+        """
+        Detecção DNN em LOTE - um único forward para vários frames.
+        Retorna uma lista (um item por frame) com o melhor rosto ou None.
+        """
+        if not frames:
+            return []
+        if not self.use_dnn or self.dnn_net is None:
+            return [None] * len(frames)
+
+        try:
+            h, w = frames[0].shape[:2]
+            blob = cv2.dnn.blobFromImages(
+                [cv2.resize(f, (300, 300)) for f in frames],
+                1.0,
+                (300, 300),
+                (104.0, 177.0, 123.0)
+            )
+            
+            self.dnn_net.setInput(blob)
+            # Cada linha: [id_do_frame, classe, confiança, x1, y1, x2, y2] (normalizado)
+            detections = self.dnn_net.forward().reshape(-1, 7)
+            
+            ids = detections[:, 0].astype(int)
+            confidence = detections[:, 2]
+            center_y = (detections[:, 4] + detections[:, 6]) / 2
+            
+            # Confiança mínima + rosto na metade superior, tudo vetorizado
+            validos = (
+                (confidence > confidence_threshold) &
+                (center_y < 0.5) &
+                (ids >= 0) & (ids < len(frames))
+            )
+            detections = detections[validos]
+            ids = ids[validos]
+            
+            # Melhor detecção de cada frame: ordena por (frame, -confiança)
+            # e fica com a primeira linha de cada frame
+            ordem = np.lexsort((-detections[:, 2], ids))
+            ids_unicos, primeiros = np.unique(ids[ordem], return_index=True)
+            melhores = detections[ordem[primeiros]]
+            boxes = (melhores[:, 3:7] * np.array([w, h, w, h])).astype(int)
+            
+            faces = [None] * len(frames)
+            for idx, (x1, y1, x2, y2), conf in zip(ids_unicos, boxes, melhores[:, 2]):
+                faces[idx] = {
+                    'x': (x1 + x2) / 2,
+                    'y': (y1 + y2) / 2,
+                    'w': x2 - x1,
+                    'h': y2 - y1,
+                    'confidence': float(conf)
+                }
+            return faces
+        except Exception as e:
+            print(f"⚠️ Erro no DNN (lote): {e}")
+            return [None] * len(frames)
+    
+    def detect_face_haar(self, frame, metade_superior=True):
         """Detecção com Haar Cascade - BACKUP"""
         try:
             gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
@@ -120,7 +205,7 @@ class RobustFaceTracker:
                 x, y, w, h = best_face
                 
                 # Valida posição (metade superior)
-                if y < frame.shape[0] * 0.5:
+                if y < frame.shape[0] * 0.5 or not metade_superior:
                     return {
                         'x': x + w/2,
                         'y': y + h/2,
@@ -133,60 +218,128 @@ class RobustFaceTracker:
             print(f"⚠️ Erro no Haar: {e}")
             return None
     
-    def get_face_position(self, frame):
+    def detect_faces_full(self, frames):
+        """Detecções cruas em lote (DNN + Haar nos frames sem rosto); quem suaviza é o CameraPathSolver"""
+        faces = self.detect_faces_batch(frames, confidence_threshold=0.6)
+        return [face if face is not None else self.detect_face_haar(frame)
+                for frame, face in zip(frames, faces)]
+    
+    def track_face(self, frame):
         """
-        MÉTODO PRINCIPAL - Combina DNN + Haar com fallback inteligente
-        Retorna a posição X do centro do rosto
+        Modo detectar-e-seguir: detecta uma vez e, entre detecções, segue o
+        rosto por template matching numa janela de busca pequena. A cada
+        `redeteccao` amostras (ou quando o template perde o rosto) re-detecta
+        só numa ROI ao redor da última caixa; a busca no frame inteiro fica
+        para quando a ROI também falha.
         """
-        # Tenta DNN primeiro (mais preciso)
-        face = self.detect_face_dnn(frame, confidence_threshold=0.6)
-        
-        # Se falhar, usa Haar
-        if face is None:
-            face = self.detect_face_haar(frame)
-        
-        # Se ainda falhar, usa última posição conhecida
+        cinza = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+        face = None
+        if self._caixa is not None:
+            if self._desde_deteccao < self.redeteccao:
+                face = self._seguir_template(cinza)
+                if face is not None:
+                    self.contagem['template'] += 1
+            if face is None:
+                face = self.detect_face_roi(frame, self._caixa)
+                if face is not None:
+                    self.contagem['roi'] += 1
+                    self._memorizar(cinza, face)
         if face is None:
-            if len(self.position_history) > 0:
-                return self.position_history[-1]  # Mantém última posição
+            face = self.detect_face_dnn(frame, confidence_threshold=0.6) or self.detect_face_haar(frame)
+            self.contagem['completa'] += 1
+            if face is not None:
+                self._memorizar(cinza, face)
             else:
-                return frame.shape[1] / 2  # Centro do frame
-        
-        # Adiciona ao histórico
-        face_x = face['x']
-        self.position_history.append(face_x)
-        
-        # Mantém histórico limitado
-        if len(self.position_history) > self.max_history:
-            self.position_history.pop(0)
-        
-        # Suavização temporal (média ponderada)
-        if len(self.position_history) > 1:
-            # Mais peso para posições recentes
-            weights = np.linspace(0.5, 1.0, len(self.position_history))
-            smoothed_x = np.average(self.position_history, weights=weights)
-            return smoothed_x
-        
-        return face_x
+                self._caixa = None  # Sem rosto: a próxima amostra volta a procurar no frame todo
+        return face
+    
+    def _regiao(self, forma, caixa, fator):
+        """Região quadrada (x0, y0, x1, y1) de `fator` vezes a caixa, dentro do frame"""
+        H, W = forma[:2]
+        x, y, w, h = caixa
+        lado = max(w, h) * fator / 2
+        return (int(max(0, x - lado)), int(max(0, y - lado)),
+                int(min(W, x + lado)), int(min(H, y + lado)))
+    
+    def detect_face_roi(self, frame, caixa, fator=2.5):
+        """Re-detecção (DNN e, se falhar, Haar) só numa região ao redor da última caixa"""
+        x0, y0, x1, y1 = self._regiao(frame.shape, caixa, fator)
+        recorte = frame[y0:y1, x0:x1]
+        if recorte.shape[0] < 40 or recorte.shape[1] < 40:
+            return None
+        face = (self.detect_face_dnn(recorte, confidence_threshold=0.6, metade_superior=False) or
+                self.detect_face_haar(recorte, metade_superior=False))
+        if face is not None:
+            face = dict(face, x=face['x'] + x0, y=face['y'] + y0)
+        return face
     
-    def reset(self):
-        """Reseta o histórico entre clipes"""
-        self.position_history = []
+    def _memorizar(self, cinza, face):
+        """Guarda a caixa e o recorte do rosto como template para as próximas amostras"""
+        self._caixa = (face['x'], face['y'], max(face['w'], 16), max(face['h'], 16))
+        x0, y0, x1, y1 = self._regiao(cinza.shape, self._caixa, 1.0)
+        self._template = cinza[y0:y1, x0:x1].copy()
+        self._desde_deteccao = 0
+    
+    def _seguir_template(self, cinza):
+        self._desde_deteccao += 1
+        th, tw = self._template.shape[:2]
+        x0, y0, x1, y1 = self._regiao(cinza.shape, self._caixa, 2.0)
+        area = cinza[y0:y1, x0:x1]
+        if th < 8 or tw < 8 or area.shape[0] < th or area.shape[1] < tw:
+            return None
+        resultado = cv2.matchTemplate(area, self._template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (lx, ly) = cv2.minMaxLoc(resultado)
+        if score < self.limiar_template:
+            return None
+        x, y = x0 + lx + tw / 2, y0 + ly + th / 2
+        self._caixa = (x, y, self._caixa[2], self._caixa[3])
+        return {'x': x, 'y': y, 'w': self._caixa[2], 'h': self._caixa[3], 'confidence': float(score)}
+    
+    def reset(self, contagem=False):
+        """Esquece o rosto seguido (entre janelas e em cortes de câmera)"""
+        if contagem:
+            self.contagem = dict.fromkeys(self.contagem, 0)
+        self._caixa = None
+        self._template = None
+        self._desde_deteccao = 0
 
 
 class VideoClipper:
-    def __init__(self):
+    def __init__(self, llm_rpm=30, llm_tpm=6000, llm_concorrencia=8, use_cache=True):
+        # Configuração repassada aos processos de renderização (que criam o próprio VideoClipper)
+        self.config = {'llm_rpm': llm_rpm, 'llm_tpm': llm_tpm,
+                       'llm_concorrencia': llm_concorrencia, 'use_cache': use_cache}
         # NOVO: Tracker robusto
         self.face_tracker = RobustFaceTracker()
         
+        # Solver offline da trajetória da câmera (substitui a média móvel causal)
+        self.camera = CameraPathSolver()
+        
+        # Compositor de legendas com cache de glifos (compartilhado entre clipes)
+        self.subtitles = SubtitleRenderer()
+        self._subtitles_preview = None  # Criado só se houver prévia
+        
         # Cliente Groq
         self.client = Groq(api_key=GROQ_API_KEY)
-
-    def processar_com_ia(self, lista_palavras, texto_continuo):
-        """Traduz o áudio para português usando uma lógica de texto completo."""
-        if not lista_palavras:
-            return [], "MOMENTO ÉPICO! 🔥", "#podcast"
         
+        # Etapa assíncrona de IA (todas as requisições de uma vez, com rate limit)
+        self.llm = LLMStage(
+            GROQ_API_KEY,
+            MODELO_IA,
+            base_url=os.environ.get("GROQ_BASE_URL"),
+            max_concorrencia=llm_concorrencia,
+            requests_por_minuto=llm_rpm,
+            tokens_por_minuto=llm_tpm
+        )
+        
+        # Cache persistente das respostas da IA (re-render sem rede)
+        self.llm_cache = LLMCache() if use_cache else None
+        
+        # Etapas persistentes: trajetórias em cache e cortes já prontos no manifesto
+        self.use_cache = use_cache
+        self.trajetorias = ArrayCache(os.path.join(CACHE_DIR, "trajetorias")) if use_cache else None
+
+    def _mensagens_ia(self, lista_palavras):
         texto_unido = " ".join(lista_palavras)
         
         # Prompt focado em tradução de texto corrido (mais fácil para a IA)
@@ -202,245 +355,818 @@ Retorne EXATAMENTE este formato JSON:
   "titulo": "Título viral em português",
   "tags": "#tags #em #portugues"
 }}"""
+        return [
+            {"role": "system", "content": "Você é um tradutor profissional. Traduza tudo para português brasileiro. Não responda em inglês."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _interpretar_ia(self, conteudo, lista_palavras, mensagens):
+        data = json.loads(conteudo)
+        completa = all(data.get(c) for c in ("texto_traduzido", "titulo", "tags"))
+        data = {
+            "texto_traduzido": data.get("texto_traduzido") or " ".join(lista_palavras),
+            "titulo": data.get("titulo") or "VÍDEO INCRÍVEL! 🔥",
+            "tags": data.get("tags") or "#viral"
+        }
+        # Só respostas completas vão pro cache: campo faltando usa o padrão só nesta execução
+        if completa and self.llm_cache is not None:
+            self.llm_cache.salvar(MODELO_IA, mensagens, FORMATO_IA, data)
+        return self._alinhar_ia(data, lista_palavras)
+
+    def _alinhar_ia(self, data, lista_palavras):
+        texto_br = data["texto_traduzido"]
+        titulo = data["titulo"]
+        tags = data["tags"]
+        
+        # Mapeia as palavras traduzidas de volta para o tamanho original
+        palavras_br = texto_br.split()
+        
+        # Lógica de ajuste para manter a sincronia:
+        # Se a tradução tiver menos palavras, repetimos a última.
+        # Se tiver mais, cortamos. Isso garante que o código não quebre.
+        if len(palavras_br) < len(lista_palavras):
+            while len(palavras_br) < len(lista_palavras):
+                palavras_br.append(palavras_br[-1] if palavras_br else "...")
+        elif len(palavras_br) > len(lista_palavras):
+            palavras_br = palavras_br[:len(lista_palavras)]
+            
+        return palavras_br, titulo, tags
+
+    def _cache_ia(self, mensagens):
+        if self.llm_cache is None:
+            return None
+        return self.llm_cache.buscar(MODELO_IA, mensagens, FORMATO_IA)
+
+    def _fallback_ia(self, lista_palavras):
+        if not lista_palavras:
+            return [], "MOMENTO ÉPICO! 🔥", "#podcast"
+        return lista_palavras, "VÍDEO VIRAL! 🔥", "#viral"
+
+    def processar_com_ia(self, lista_palavras, texto_continuo):
+        """Traduz o áudio para português usando uma lógica de texto completo."""
+        if not lista_palavras:
+            return self._fallback_ia(lista_palavras)
+
+        mensagens = self._mensagens_ia(lista_palavras)
+        data = self._cache_ia(mensagens)
+        if data is not None:
+            # Cache hit: sem rede e sem a pausa de rate limit
+            return self._alinhar_ia(data, lista_palavras)
 
         try:
             time.sleep(0.5) 
             chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": "Você é um tradutor profissional. Traduza tudo para português brasileiro. Não responda em inglês."},
-                    {"role": "user", "content": prompt}
-                ],
-                model="llama-3.3-70b-versatile",
-                response_format={"type": "json_object"}
+                messages=mensagens,
+                model=MODELO_IA,
+                response_format=FORMATO_IA
             )
-
-            data = json.loads(chat_completion.choices[0].message.content)
-            texto_br = data.get("texto_traduzido", texto_unido)
-            titulo = data.get("titulo", "VÍDEO INCRÍVEL! 🔥")
-            tags = data.get("tags", "#viral")
-            
-            # Mapeia as palavras traduzidas de volta para o tamanho original
-            palavras_br = texto_br.split()
-            
-            # Lógica de ajuste para manter a sincronia:
-            # Se a tradução tiver menos palavras, repetimos a última.
-            # Se tiver mais, cortamos. Isso garante que o código não quebre.
-            if len(palavras_br) < len(lista_palavras):
-                while len(palavras_br) < len(lista_palavras):
-                    palavras_br.append(palavras_br[-1] if palavras_br else "...")
-            elif len(palavras_br) > len(lista_palavras):
-                palavras_br = palavras_br[:len(lista_palavras)]
-                
-            return palavras_br, titulo, tags
+            return self._interpretar_ia(chat_completion.choices[0].message.content, lista_palavras, mensagens)
             
         except Exception as e:
             print(f"⚠️ Erro na tradução: {e}")
-            return lista_palavras, "VÍDEO VIRAL! 🔥", "#viral"
-
-    def create_subtitle(self, text, start, duration):
-        """Cria o clipe de texto para a legenda"""
-        txt_clip = TextClip(
-            txt=f" {text.upper()} ",
-            fontsize=80,
-            color='yellow',
-            stroke_color='black',
-            stroke_width=3,
-            method='label',
-            font='/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
-            align='center'
+            return self._fallback_ia(lista_palavras)
+
+    def iniciar_ia(self, listas_palavras, somente_cache=False):
+        """
+        Dispara a tradução + título de todos os momentos em paralelo.
+        Retorna um Future por momento com (palavras_traduzidas, titulo, tags).
+        Momentos sem fala ou já presentes no cache resolvem na hora.
+        Com somente_cache=True nada vai para a rede: quem não está no cache
+        fica com o texto original (usado pela prévia sem IA).
+        """
+        futuros = [None] * len(listas_palavras)
+        pendentes = []
+        for k, lista in enumerate(listas_palavras):
+            if not lista:
+                futuros[k] = _resolvido(self._fallback_ia(lista))
+                continue
+            mensagens = self._mensagens_ia(lista)
+            data = self._cache_ia(mensagens)
+            if data is not None:
+                futuros[k] = _resolvido(self._alinhar_ia(data, lista))
+            elif somente_cache:
+                futuros[k] = _resolvido(self._fallback_ia(lista))
+            else:
+                pendentes.append((k, mensagens))
+
+        futuros_llm = self.llm.iniciar(
+            [(mensagens, FORMATO_IA) for _, mensagens in pendentes],
+            interpretar=lambda j, conteudo: self._interpretar_ia(
+                conteudo, listas_palavras[pendentes[j][0]], pendentes[j][1]
+            ),
+            fallback=lambda j: self._fallback_ia(listas_palavras[pendentes[j][0]])
         )
-        if txt_clip.w > 900:
-            txt_clip = txt_clip.resize(width=900)
-        return txt_clip.set_position(('center', 1400)).set_start(start).set_duration(duration)
+        for (k, _), futuro in zip(pendentes, futuros_llm):
+            futuros[k] = futuro
+        return futuros
 
-    def create_all_clips(self, video_path, transcription, moments, output_dir):
+    def _janela(self, i, m, duracao_video, output_dir):
+        """Calcula o intervalo do corte i e a pasta de saída"""
+        is_longo = (i % 4 == 0) 
+        duracao_alvo = 65 if is_longo else 40
+        pasta_nome = f"corte_{i:02d}_{'LONGO' if is_longo else 'CURTO'}"
+        pasta_corte = os.path.join(output_dir, pasta_nome)
+        
+        # Início do corte (2 segundos de folga para contexto)
+        start_t = max(0, m['timestamp'] - 2)
+        end_t = min(start_t + duracao_alvo, duracao_video)
+        return start_t, end_t, pasta_corte
+
+    def _perfil(self, preview):
+        """Resolução, fps, encoder e compositor de legendas do modo de saída"""
+        if not preview:
+            return dict(PERFIL_FINAL, subtitles=self.subtitles)
+        if self._subtitles_preview is None:
+            # Mesmo layout das legendas finais, em escala (o vídeo é 1/4 da largura)
+            escala = PERFIL_PREVIEW['tamanho'][0] / PERFIL_FINAL['tamanho'][0]
+            self._subtitles_preview = SubtitleRenderer(escala=escala)
+        return dict(PERFIL_PREVIEW, subtitles=self._subtitles_preview)
+
+    def create_all_clips(self, video_path, transcription, moments, output_dir, workers=1, backend='moviepy', indice=None, pcm=None,
+                         rastreamento='lote', rostos=None, preview=False, usar_ia=True):
+        """
+        Gera todos os cortes. Com workers > 1 cada momento vai para um processo
+        separado (leitor e tracker próprios) e as threads do encoder são
+        divididas entre eles. Retorna os caminhos dos vídeos na ordem dos momentos.
+        
+        backend='ffmpeg' envia os frames direto para um ffmpeg por pipe,
+        sem o compositing do moviepy; backend='unico' faz o mesmo, mas lê a
+        fonte uma única vez para todos os cortes (render_single_pass), num
+        único processo: `workers` não se aplica a ele.
+        
+        As requisições de IA de todos os momentos saem logo no início, em
+        paralelo; cada renderização só espera pelo resultado do próprio corte.
+        
+        `indice` (TranscriptIndex) pode ser passado para reaproveitar o índice
+        já usado na detecção de momentos; `pcm` (SharedPCM) fornece o áudio
+        dos cortes sem decodificar a trilha de novo.
+        
+        rastreamento='seguir' detecta o rosto uma vez e o segue por template
+        entre detecções (track_face); 'lote' detecta em toda amostra.
+        Com `rostos` (FaceTrack do episódio inteiro) as trajetórias saem de
+        fatias do índice e nenhum corte roda detecção.
+        
+        preview=True renderiza uma prévia 270x480 a 15 fps (ultrafast) em
+        output_dir/preview, com a mesma trajetória e as mesmas legendas do
+        render final; usar_ia=False não chama a IA (só o que já está em
+        cache). O tracking e as respostas da IA ficam em cache, então o
+        render final depois da prévia não refaz nenhum dos dois.
+        
+        Com cache ligado, cada corte pronto fica registrado no manifesto da
+        pasta de saída (PipelineManifest); rodar de novo só renderiza os
+        cortes cujas entradas mudaram (janela, trajetória, legendas, IA,
+        perfil), então uma execução interrompida retoma de onde parou.
+        """
+        if preview:
+            output_dir = os.path.join(output_dir, PERFIL_PREVIEW['pasta'])
+            if backend == 'moviepy':
+                backend = 'ffmpeg'  # A prévia não precisa do compositing do moviepy
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
+        manifesto = PipelineManifest(output_dir) if self.use_cache else None
+        
+        # Índice das palavras por tempo: construído uma vez, consultado por bisseção
+        if indice is None:
+            indice = TranscriptIndex(transcription)
 
         video = VideoFileClip(video_path)
-        
+        listas_palavras = []
+        for i, m in enumerate(moments, 1):
+            start_t, end_t, _ = self._janela(i, m, video.duration, output_dir)
+            listas_palavras.append(indice.textos(start_t, end_t))
+        if usar_ia:
+            print(f"🤖 Enviando {len(moments)} pedidos de tradução para a IA...")
+        else:
+            print("🤖 IA desativada: usando só as traduções já em cache")
+        futuros_ia = self.iniciar_ia(listas_palavras, somente_cache=not usar_ia)
+        if self.llm_cache is not None:
+            print(f"💾 Cache da IA: {self.llm_cache.resumo()}")
+
+        if backend == 'unico':
+            # Prepara todos os cortes e decodifica a fonte uma única vez para todos
+            if workers > 1:
+                print(f"⚠️ backend 'unico' renderiza num único processo: workers={workers} ignorado "
+                      f"(os encoders já rodam em paralelo, um ffmpeg por corte aberto)")
+            cortes = [
+                self.preparar_corte(video, video_path, indice, i, m, output_dir, ia=futuros_ia[i - 1],
+                                    rastreamento=rastreamento, rostos=rostos, preview=preview)
+                for i, m in enumerate(tqdm(moments, desc="Preparando cortes"), 1)
+            ]
+            tamanho_origem = (video.w, video.h)
+            video.close()
+            faltam = [c for c in cortes if manifesto is None or not manifesto.corte_pronto(c)]
+            if len(faltam) < len(cortes):
+                print(f"♻️ {len(cortes) - len(faltam)} cortes já renderizados com as mesmas entradas, pulando")
+
+            def concluido(corte):
+                self.salvar_postagem(corte)
+                if manifesto is not None:
+                    manifesto.registrar_corte(corte)
+
+            if faltam:
+                self.render_single_pass(video_path, faltam, tamanho_origem, pcm=pcm, ao_concluir=concluido)
+            return [corte['caminho_video'] for corte in cortes]
+
+        opcoes = {'backend': backend, 'pcm': pcm, 'rastreamento': rastreamento, 'rostos': rostos,
+                  'preview': preview, 'manifesto': manifesto}
+        if workers > 1 and len(moments) > 1:
+            video.close()
+            return _create_all_clips_parallel(
+                video_path, indice, moments, output_dir, workers, opcoes, futuros_ia, self.config
+            )
+
+        caminhos = []
         for i, m in enumerate(tqdm(moments, desc="Cortando momentos"), 1):
-            # Reseta tracker para cada clipe
-            self.face_tracker.reset()
-            
-            is_longo = (i % 4 == 0) 
-            duracao_alvo = 65 if is_longo else 40
-            pasta_nome = f"corte_{i:02d}_{'LONGO' if is_longo else 'CURTO'}"
-            pasta_corte = os.path.join(output_dir, pasta_nome)
-            os.makedirs(pasta_corte, exist_ok=True)
-            
-            # Início do corte (2 segundos de folga para contexto)
-            start_t = max(0, m['timestamp'] - 2)
-            end_t = min(start_t + duracao_alvo, video.duration)
+            caminhos.append(self.render_moment(
+                video, video_path, indice, i, m, output_dir,
+                ia=futuros_ia[i - 1], **opcoes
+            ))
+        video.close()
+        return caminhos
+
+    def render_moment(self, video, video_path, indice, i, m, output_dir, threads=4, logger='bar', backend='moviepy', ia=None, pcm=None,
+                      rastreamento='lote', rostos=None, preview=False, manifesto=None):
+        """
+        Rastreia, traduz e renderiza um único momento. Retorna o caminho do vídeo.
+        `ia` pode ser o resultado (ou Future) da tradução já disparada; sem ele
+        a tradução é feita aqui mesmo, de forma síncrona.
+        Com `manifesto`, um corte já pronto com as mesmas entradas é pulado.
+        """
+        corte = self.preparar_corte(video, video_path, indice, i, m, output_dir, ia=ia,
+                                    rastreamento=rastreamento, rostos=rostos, preview=preview)
+        start_t, end_t = corte['start_t'], corte['end_t']
+        crop_path, faixa = corte['crop_path'], corte['faixa']
+        caminho_video, fps_saida = corte['caminho_video'], corte['fps']
+        subtitles = corte['subtitles']
+        if manifesto is not None and manifesto.corte_pronto(corte):
+            print(f"  ♻️ Corte {i} já renderizado com as mesmas entradas, pulando")
+            return caminho_video
+        print(f"  🎬 Renderizando vídeo_{i:02d}.mp4...")
+        
+        if backend == 'ffmpeg':
+            self.render_ffmpeg(
+                video_path, start_t, end_t, (video.w, video.h),
+                crop_path, faixa, caminho_video, fps_saida, threads,
+                preset=corte['preset'], crf=corte['crf'], pcm=pcm, subtitles=subtitles
+            )
+        else:
             sub = video.subclip(start_t, end_t)
+            if pcm is not None and pcm.tem_audio:
+                # Áudio do corte lido do PCM compartilhado (sem novo decode, float32 direto do memmap)
+                sub = sub.set_audio(AudioArrayClip(pcm.fatia_saida_float(start_t, end_t), fps=pcm.SR_SAIDA))
             
             # --- EFEITO DE ÁUDIO (0 a 100%) ---
             # Fade in e out de 0.5s para não cobrir a fala inicial
             sub = sub.fx(afx.audio_fadein, 0.5).fx(afx.audio_fadeout, 0.5)
             
-            # === TRACKING MELHORADO ===
-            print(f"  🎯 Rastreando rosto no clipe {i}...")
-            
-            keyframes = []
-            frame_interval = 0.2  # Analisa a cada 200ms
-            
-            for t in np.arange(0, sub.duration, frame_interval):
-                try:
-                    frame = sub.get_frame(min(t, sub.duration - 0.01))
-                    face_x = self.face_tracker.get_face_position(frame)
-                    keyframes.append((t, face_x))
-                except Exception as e:
-                    print(f"    ⚠️ Erro no frame {t:.2f}s: {e}")
-                    if keyframes:
-                        keyframes.append((t, keyframes[-1][1]))
-                    else:
-                        keyframes.append((t, sub.w / 2))
+            # Crop dinâmico com Câmera Fluida + legendas aplicadas direto no frame
+            # (sem realocar o frame de saída e sem uma camada por legenda)
+            def smooth_crop(get_frame, t):
+                quadro = crop_path.recortar(get_frame(t), t)
+                return subtitles.compor(quadro, faixa, t)
             
-            if not keyframes or keyframes[-1][0] < sub.duration:
-                last_x = keyframes[-1][1] if keyframes else sub.w / 2
-                keyframes.append((sub.duration, last_x))
+            # Composição Final
+            final = sub.fl(smooth_crop).set_duration(sub.duration)
+            temp = caminho_parcial(caminho_video)  # Nome final só com o arquivo completo
+            final.write_videofile(
+                temp, 
+                codec='libx264', 
+                audio_codec='aac', 
+                threads=threads, 
+                fps=fps_saida,
+                preset=corte['preset'],
+                logger=logger
+            )
+            os.replace(temp, caminho_video)
+        
+        self.salvar_postagem(corte)
+        if manifesto is not None:
+            manifesto.registrar_corte(corte)
+        return caminho_video
+
+    def preparar_corte(self, video, video_path, indice, i, m, output_dir, ia=None, rastreamento='lote', rostos=None,
+                       preview=False):
+        """
+        Tudo o que vem antes da renderização de um momento: janela, trajetória
+        do recorte, tradução e legendas. Retorna um dict com o que os
+        backends de renderização e a postagem precisam.
+        Na prévia só mudam a resolução, o fps e o encoder (perfil).
+        """
+        perfil = self._perfil(preview)
+        fps_saida = perfil['fps']
+        
+        start_t, end_t, pasta_corte = self._janela(i, m, video.duration, output_dir)
+        os.makedirs(pasta_corte, exist_ok=True)
+        duracao = end_t - start_t
+        
+        # === TRACKING MELHORADO ===
+        def resolver_trajetoria():
+            if rostos is not None:
+                # Fatia do índice do episódio: nenhuma detecção roda para o corte
+                faixa_rostos = rostos.fatia(start_t, end_t)
+            else:
+                print(f"  🎯 Rastreando rosto no clipe {i}...")
+                # Analisa a cada 200ms, decodificando a janela uma única vez
+                # (em cache: prévia e render final usam as mesmas detecções)
+                faixa_rostos = FaceTrack.da_janela(
+                    self.face_tracker, video_path, start_t, end_t, (video.w, video.h),
+                    intervalo=0.2, rastreamento=rastreamento, use_cache=self.use_cache
+                )
             
-            # Interpolação suave
-            def get_smooth_x(t):
-                for j in range(len(keyframes) - 1):
-                    t1, x1 = keyframes[j]
-                    t2, x2 = keyframes[j + 1]
-                    if t1 <= t <= t2:
-                        progress = (t - t1) / (t2 - t1) if t2 > t1 else 0
-                        smooth_progress = progress * progress * (3 - 2 * progress)
-                        return x1 + (x2 - x1) * smooth_progress
-                return keyframes[-1][1]
+            # Trajetória do recorte resolvida de uma vez: um X por frame de saída
+            return self.camera.resolver(
+                faixa_rostos.tempos, faixa_rostos.xs, faixa_rostos.confiancas, faixa_rostos.cortes,
+                duracao, fps_saida, video.w
+            )
+        
+        # Trajetória em cache, endereçada pela janela, pela origem dos rostos e pelo solver
+        chave_trajetoria = hash_dados(
+            hash_arquivo(video_path), start_t, end_t, fps_saida, (video.w, video.h),
+            'indice' if rostos is not None else 'janela', rastreamento, VERSAO_ROSTOS, vars(self.camera)
+        )
+        if self.trajetorias is not None:
+            centros = self.trajetorias.obter(chave_trajetoria, resolver_trajetoria)
+        else:
+            centros = resolver_trajetoria()
+        crop_path = CropPath.from_centers(centros, fps_saida, (video.w, video.h), perfil['tamanho'])
+        
+        # --- PROCESSAMENTO DE LEGENDAS (EM DUPLAS PARA MELHOR LEITURA) ---
+        palavras_trecho = indice.palavras(start_t, end_t)
+
+        if ia is None:
+            lista_txt = [w['word'].strip() for w in palavras_trecho]
+            ia = self.processar_com_ia(lista_txt, " ".join(lista_txt))
+        elif isinstance(ia, Future):
+            ia = ia.result()  # Normalmente já chegou enquanto rastreávamos
+        texto_final, titulo_ia, tags_ia = ia
+
+        legendas = []
+        # Agrupando de 2 em 2 palavras para a legenda não ficar rápida demais
+        group_size = 2
+        for idx in range(0, len(palavras_trecho), group_size):
+            grupo = palavras_trecho[idx:idx+group_size]
+            if idx >= len(texto_final): break
             
-            # Crop dinâmico com Câmera Fluida e Headroom
-            def smooth_crop(get_frame, t):
-                try:
-                    frame = get_frame(t)
-                    x_pos = get_smooth_x(t)
-                    
-                    # Define a largura alvo (9:16)
-                    h, w = frame.shape[:2]
-                    target_w = int(h * (9/16))
-                    
-                    # Cálculo do X com suavização lateral
-                    x1 = int(max(0, min(x_pos - target_w/2, w - target_w)))
-                    
-                    # Ajuste de enquadramento vertical (Headroom)
-                    # Em vez de centralizar o rosto, vamos deixar ele no terço superior
-                    # Isso evita cortar o topo da cabeça e deixa espaço para legendas
-                    cropped = frame[:, x1:x1+target_w]
-                    
-                    # Redimensiona para o formato final
-                    return cv2.resize(cropped, (1080, 1920))
-                except Exception as e:
-                    frame = get_frame(t)
-                    h, w = frame.shape[:2]
-                    target_w = int(h * (9/16))
-                    x1 = max(0, (w - target_w) // 2)
-                    cropped = frame[:, x1:x1+target_w]
-                    return cv2.resize(cropped, (1080, 1920))
+            # Pega o texto traduzido correspondente ao grupo
+            texto_exibir = " ".join(texto_final[idx:idx+group_size])
             
-            sub_v = sub.fl(smooth_crop)
+            s = grupo[0]['start'] - start_t
+            e = grupo[-1]['end'] - start_t
+            dur = e - s
             
-            # --- PROCESSAMENTO DE LEGENDAS (EM DUPLAS PARA MELHOR LEITURA) ---
-            palavras_trecho = []
-            for segment in transcription['segments']:
-                for w_data in segment.get('words', []):
-                    if w_data['start'] >= start_t and w_data['end'] <= end_t:
-                        palavras_trecho.append(w_data)
+            if dur > 0:
+                legendas.append((s, e, texto_exibir))
+        
+        faixa = CaptionTrack(legendas)
+        
+        # Tudo o que define o vídeo final: se nada mudar, o corte pronto vale
+        chave = hash_dados(
+            VERSAO_RENDER, chave_trajetoria, legendas, titulo_ia, tags_ia,
+            perfil['tamanho'], perfil['fps'], perfil['preset'], perfil['crf'], perfil['subtitles'].estilo
+        )
+        
+        return {
+            'i': i,
+            'start_t': start_t,
+            'end_t': end_t,
+            'fps': fps_saida,
+            'pasta_corte': pasta_corte,
+            'caminho_video': os.path.join(pasta_corte, f"video_{i:02d}.mp4"),
+            'crop_path': crop_path,
+            'faixa': faixa,
+            'titulo': titulo_ia,
+            'tags': tags_ia,
+            'subtitles': perfil['subtitles'],
+            'preset': perfil['preset'],
+            'crf': perfil['crf'],
+            'chave': chave,
+        }
+
+    def salvar_postagem(self, corte):
+        """Grava o postagem.txt (título e tags da IA) na pasta do corte"""
+        i, pasta_corte = corte['i'], corte['pasta_corte']
+        titulo_ia, tags_ia = corte['titulo'], corte['tags']
+        # --- SALVAMENTO SEGURO DA POSTAGEM (SEM ASPAS) ---
+        try:
+            if isinstance(tags_ia, list):
+                tags_limpo = " ".join(map(str, tags_ia))
+            else:
+                tags_limpo = str(tags_ia)
+
+            tags_limpo = tags_limpo.replace('"', '').replace("'", "")
+            titulo_limpo = str(titulo_ia).replace('"', '').replace("'", "")
+
+            with open(os.path.join(pasta_corte, "postagem.txt"), "w", encoding="utf-8") as f:
+                f.write(f"TITULO: {titulo_limpo}\nTAGS: {tags_limpo}")
+            print(f"  📄 Arquivo de postagem salvo para clipe {i}")
+        except Exception as e:
+            print(f"  ⚠️ Erro ao salvar postagem: {e}")
+            with open(os.path.join(pasta_corte, "postagem.txt"), "w", encoding="utf-8") as f:
+                f.write(f"TITULO: {titulo_ia}\nTAGS: {tags_ia}")
+
+    def _writer(self, video_path, corte, threads=4, pcm=None):
+        """Encoder ffmpeg do corte, com o áudio da janela (do PCM compartilhado, se houver)"""
+        start_t, end_t = corte['start_t'], corte['end_t']
+        audio_formato, audio_arquivo = pcm.entrada_ffmpeg() if pcm is not None else (None, video_path)
+        return FFmpegPipeWriter(
+            corte['caminho_video'],
+            corte['crop_path'].tamanho_saida,
+            corte['fps'],
+            audio=(audio_arquivo, start_t, end_t - start_t),
+            audio_formato=audio_formato,
+            threads=threads,
+            preset=corte.get('preset', 'medium'),
+            crf=corte.get('crf')
+        )
+
+    def render_ffmpeg(self, video_path, start_t, end_t, tamanho_origem, crop_path, faixa,
+                      caminho_video, fps, threads=4, preset='medium', crf=None, pcm=None, subtitles=None):
+        """
+        Backend de renderização direto no ffmpeg: decodifica a janela em ordem,
+        aplica recorte + legendas no buffer e escreve os frames rgb24 no pipe.
+        O áudio (com fades) é muxado na mesma chamada do ffmpeg; com `pcm`
+        ele vem da trilha crua já extraída, sem decodificar o vídeo de novo.
+        `subtitles` troca o compositor de legendas (a prévia usa um em escala).
+        """
+        subtitles = subtitles or self.subtitles
+        frames = SequentialFrameSampler(
+            video_path, start_t, end_t, 1.0 / fps, tamanho_origem, largura_analise=None
+        )
+        corte = {'start_t': start_t, 'end_t': end_t, 'fps': fps, 'preset': preset, 'crf': crf,
+                 'caminho_video': caminho_video, 'crop_path': crop_path}
+        with self._writer(video_path, corte, threads, pcm) as writer:
+            for t, frame in frames:
+                quadro = crop_path.recortar(frame, t)
+                writer.escrever(subtitles.compor(quadro, faixa, t))
+
+    def render_single_pass(self, video_path, cortes, tamanho_origem, threads=4, pcm=None, folga=5.0,
+                           ao_concluir=None):
+        """
+        Renderiza todos os cortes decodificando a fonte UMA vez: as janelas são
+        ordenadas e agrupadas (sobrepostas ou a menos de `folga` segundos),
+        cada grupo é lido por um único decodificador sequencial e cada frame
+        vai para os encoders de todos os cortes cuja janela o contém.
+        Momentos sobrepostos compartilham os frames decodificados.
+        Encoder (preset/crf) e legendas vêm de cada corte (preparar_corte).
+        `ao_concluir(corte)` é chamado assim que cada vídeo fica completo.
+        """
+        grupos = []
+        for corte in sorted(cortes, key=lambda c: c['start_t']):
+            if grupos and corte['start_t'] <= grupos[-1]['fim'] + folga:
+                grupos[-1]['cortes'].append(corte)
+                grupos[-1]['fim'] = max(grupos[-1]['fim'], corte['end_t'])
+            else:
+                grupos.append({'inicio': corte['start_t'], 'fim': corte['end_t'], 'cortes': [corte]})
+
+        decodificado = sum(g['fim'] - g['inicio'] for g in grupos)
+        soma = sum(c['end_t'] - c['start_t'] for c in cortes)
+        print(f"🎞️ {len(cortes)} cortes em {len(grupos)} leituras sequenciais "
+              f"({decodificado:.0f}s decodificados para {soma:.0f}s de cortes)")
+        for grupo in tqdm(grupos, desc="Renderizando (passada única)"):
+            self._render_grupo(video_path, grupo, tamanho_origem, threads, pcm, ao_concluir)
+
+    def _render_grupo(self, video_path, grupo, tamanho_origem, threads, pcm, ao_concluir=None):
+        fps = grupo['cortes'][0]['fps']
+        frames = SequentialFrameSampler(
+            video_path, grupo['inicio'], grupo['fim'], 1.0 / fps, tamanho_origem, largura_analise=None
+        )
+        pendentes = list(grupo['cortes'])  # Já em ordem de início
+        abertos = []  # (corte, writer) com a janela em andamento
+        meio_frame = 0.5 / fps
+
+        def fechar(item, erro=None):
+            abertos.remove(item)
+            if erro is None:
+                item[1].__exit__(None, None, None)
+                if ao_concluir is not None:
+                    ao_concluir(item[0])
+            else:
+                item[1].__exit__(type(erro), erro, erro.__traceback__)
+
+        try:
+            for t, frame in frames:
+                t_abs = grupo['inicio'] + t
+                while pendentes and pendentes[0]['start_t'] <= t_abs + meio_frame:
+                    corte = pendentes.pop(0)
+                    writer = self._writer(video_path, corte, threads, pcm)
+                    writer.__enter__()
+                    abertos.append((corte, writer))
+                for item in list(abertos):
+                    corte, writer = item
+                    if t_abs >= corte['end_t'] - meio_frame:
+                        fechar(item)  # Janela terminou: libera o encoder
+                        continue
+                    t_local = t_abs - corte['start_t']
+                    quadro = corte['crop_path'].recortar(frame, t_local)
+                    writer.escrever(corte['subtitles'].compor(quadro, corte['faixa'], t_local))
+            for item in list(abertos):
+                fechar(item)
+        except BaseException as e:
+            for item in list(abertos):
+                fechar(item, e)
+            raise
+        for corte in pendentes:
+            print(f"  ⚠️ Corte {corte['i']} começa depois do fim da fonte; não renderizado")
+
+
+def _resolvido(valor):
+    """Future já concluído (para resultados que não precisam esperar a IA)"""
+    futuro = Future()
+    futuro.set_result(valor)
+    return futuro
+
+
+# --- RENDERIZAÇÃO PARALELA (um processo por momento) ---
+_worker = {}
+
+
+def _init_render_worker(video_path, indice, output_dir, opcoes, config):
+    """Cada processo abre seu próprio leitor e seu próprio tracker (mesma config do pai, ex: --sem-cache)"""
+    _worker['clipper'] = VideoClipper(**config)
+    _worker['video'] = VideoFileClip(video_path)
+    _worker['video_path'] = video_path
+    _worker['indice'] = indice
+    _worker['output_dir'] = output_dir
+    _worker['opcoes'] = opcoes
+
+
+def _render_worker(i, m, threads, ia):
+    return _worker['clipper'].render_moment(
+        _worker['video'],
+        _worker['video_path'],
+        _worker['indice'],
+        i, m,
+        _worker['output_dir'],
+        threads=threads,
+        logger=None,  # Barras de progresso de vários processos se misturam
+        ia=ia,
+        **_worker['opcoes']
+    )
+
+
+def _create_all_clips_parallel(video_path, indice, moments, output_dir, workers, opcoes, futuros_ia, config):
+    workers = min(workers, len(moments))
+    # Divide as threads do encoder entre os workers
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"⚡ Renderizando {len(moments)} cortes em {workers} processos ({threads} threads cada)...")
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_render_worker,
+        initargs=(video_path, indice, output_dir, opcoes, config)
+    ) as pool:
+        # Cada corte entra na fila assim que a resposta da IA dele chega
+        indices = {f: i for i, f in enumerate(futuros_ia, 1)}
+        futuros = {}
+        for f in as_completed(futuros_ia):
+            i = indices[f]
+            futuros[i] = pool.submit(_render_worker, i, moments[i - 1], threads, f.result())
+        for _ in tqdm(as_completed(futuros.values()), total=len(futuros), desc="Cortando momentos"):
+            pass
+        # Resultados na ordem dos momentos, não na ordem de término
+        return [futuros[i].result() for i in range(1, len(moments) + 1)]
 
-            lista_txt = [w['word'].strip() for w in palavras_trecho]
-            texto_continuo = " ".join(lista_txt)
 
-            texto_final, titulo_ia, tags_ia = self.processar_com_ia(
-                lista_txt,
-                texto_continuo
+def processar_episodio(clipper, processador, video_path, max_clips=11, deteccao="auto",
+                       workers=1, backend="moviepy", output_dir="output", rastreamento="lote",
+                       indice_rostos=True, preview=False, usar_ia=True):
+    """
+    Pipeline completo de um episódio já gravado: transcrição, escolha dos
+    momentos e cortes. Reaproveita `clipper` e `processador` (modelos já
+    carregados), então pode ser chamado várias vezes pelo daemon.
+    Retorna os caminhos dos vídeos gerados. Com cache ligado, as etapas já
+    feitas (transcrição, momentos, rostos, trajetórias, IA, cortes prontos)
+    são reaproveitadas e só o que mudou é recalculado.
+    preview=True gera só a prévia em baixa resolução (output_dir/preview);
+    usar_ia=False não chama a IA (vale o que já estiver em cache).
+    """
+    # Trilha extraída uma vez e compartilhada (Whisper, energia e cortes)
+    pcm = SharedPCM(video_path)
+    result = processador.process_video(video_path, pcm=pcm)
+    indice = TranscriptIndex(result)
+
+    v_meta = VideoFileClip(video_path)
+    total_duration = v_meta.duration
+    tamanho_origem = (v_meta.w, v_meta.h)
+    v_meta.close()
+
+    def escolher_momentos():
+        pontos_corte = []
+        if deteccao != "uniforme":
+            audio_scores = None
+            if deteccao == "auto":
+                print("🔊 Analisando energia do áudio...")
+                audio_scores = AudioScorer().pontuar_pcm(pcm)
+            pontos_corte = MomentDetector().find_best_moments(
+                result, max_clips, indice=indice, audio_scores=audio_scores
             )
+            if not pontos_corte:
+                print("⚠️ Nenhum momento detectado, usando distribuição uniforme")
 
-            subs_clips = []
-            # Agrupando de 2 em 2 palavras para a legenda não ficar rápida demais
-            group_size = 2
-            for idx in range(0, len(palavras_trecho), group_size):
-                grupo = palavras_trecho[idx:idx+group_size]
-                if idx >= len(texto_final): break
-                
-                # Pega o texto traduzido correspondente ao grupo
-                texto_exibir = " ".join(texto_final[idx:idx+group_size])
-                
-                s = grupo[0]['start'] - start_t
-                e = grupo[-1]['end'] - start_t
-                dur = e - s
-                
-                if dur > 0:
-                    subs_clips.append(self.create_subtitle(texto_exibir, s, dur))
-            
-            # Composição Final
-            final = CompositeVideoClip(
-                [sub_v] + subs_clips,
-                size=(1080, 1920)
-            ).set_duration(sub.duration)
+        if not pontos_corte:
+            # Lógica de distribuição dos cortes
+            intervalo = total_duration / (max_clips + 1)
+            pontos_corte = [{"timestamp": i * intervalo} for i in range(1, max_clips + 1)]
+        return pontos_corte
 
-            print(f"  🎬 Renderizando vídeo_{i:02d}.mp4...")
-            final.write_videofile(
-                os.path.join(pasta_corte, f"video_{i:02d}.mp4"), 
-                codec='libx264', 
-                audio_codec='aac', 
-                threads=4, 
-                fps=30
+    if clipper.use_cache:
+        # Momentos no manifesto: só mudam com a mídia, a transcrição ou as opções
+        chave = hash_dados(VERSAO_RENDER, hash_arquivo(video_path), result.get('segments', []), max_clips, deteccao)
+        pontos_corte = PipelineManifest(output_dir).etapa('momentos', chave, escolher_momentos)
+    else:
+        pontos_corte = escolher_momentos()
+
+    rostos = None
+    if indice_rostos:
+        # Rostos do episódio inteiro (em cache): os cortes só fatiam o índice
+        rostos = FaceTrack.do_episodio(
+            clipper.face_tracker, video_path, total_duration, tamanho_origem,
+            rastreamento=rastreamento, use_cache=clipper.use_cache
+        )
+
+    print(f"✂️ Gerando {len(pontos_corte)} cortes...")
+    return clipper.create_all_clips(
+        video_path, result, pontos_corte, output_dir,
+        workers=workers,
+        backend=backend,
+        indice=indice,
+        pcm=pcm,
+        rastreamento=rastreamento,
+        rostos=rostos,
+        preview=preview,
+        usar_ia=usar_ia
+    )
+
+
+# Opções da CLI que viajam com cada job para o daemon
+OPCOES_JOB = ("max", "model", "idioma", "transcricao_workers", "sem_vad", "sem_cache", "deteccao", "workers", "backend",
+              "rastreamento", "sem_indice_rostos", "preview", "sem_ia", "llm_rpm", "llm_tpm", "llm_concorrencia")
+
+
+def servir_daemon(args):
+    """
+    Sobe o daemon com os modelos carregados uma única vez. Opções ausentes
+    no job (ex: POST feito à mão) usam as do próprio daemon.
+    """
+    clippers = {}
+    processadores = {}
+
+    def opcao(job, nome):
+        return job.get(nome, getattr(args, nome))
+
+    def clipper_para(job):
+        chave = (opcao(job, "llm_rpm"), opcao(job, "llm_tpm"), opcao(job, "llm_concorrencia"),
+                 not opcao(job, "sem_cache"))
+        if chave not in clippers:
+            clippers[chave] = VideoClipper(
+                llm_rpm=chave[0],
+                llm_tpm=chave[1],
+                llm_concorrencia=chave[2],
+                use_cache=chave[3]
             )
-            
-            # --- SALVAMENTO SEGURO DA POSTAGEM (SEM ASPAS) ---
-            try:
-                if isinstance(tags_ia, list):
-                    tags_limpo = " ".join(map(str, tags_ia))
-                else:
-                    tags_limpo = str(tags_ia)
-
-                tags_limpo = tags_limpo.replace('"', '').replace("'", "")
-                titulo_limpo = str(titulo_ia).replace('"', '').replace("'", "")
-
-                with open(os.path.join(pasta_corte, "postagem.txt"), "w", encoding="utf-8") as f:
-                    f.write(f"TITULO: {titulo_limpo}\nTAGS: {tags_limpo}")
-                print(f"  📄 Arquivo de postagem salvo para clipe {i}")
-            except Exception as e:
-                print(f"  ⚠️ Erro ao salvar postagem: {e}")
-                with open(os.path.join(pasta_corte, "postagem.txt"), "w", encoding="utf-8") as f:
-                    f.write(f"TITULO: {titulo_ia}\nTAGS: {tags_ia}")
+        return clippers[chave]
 
-        video.close()
+    def processador_para(job):
+        chave = (opcao(job, "model"), opcao(job, "idioma"), opcao(job, "transcricao_workers"),
+                 not opcao(job, "sem_vad"), not opcao(job, "sem_cache"))
+        if chave not in processadores:
+            processadores[chave] = AudioProcessor(
+                model_size=chave[0],
+                language=chave[1],
+                use_cache=chave[4],
+                verbose=False,
+                workers=chave[2],
+                vad=chave[3]
+            )
+        return processadores[chave]
+
+    def executar(job):
+        return processar_episodio(
+            clipper_para(job), processador_para(job), job["video"],
+            max_clips=opcao(job, "max"),
+            deteccao=opcao(job, "deteccao"),
+            workers=opcao(job, "workers"),
+            backend=opcao(job, "backend"),
+            output_dir=job.get("output_dir", "output"),
+            rastreamento=opcao(job, "rastreamento"),
+            indice_rostos=not opcao(job, "sem_indice_rostos"),
+            preview=opcao(job, "preview"),
+            usar_ia=not opcao(job, "sem_ia")
+        )
+
+    # Aquece o Whisper e o tracker padrão antes do primeiro job chegar
+    clipper_para({})
+    processador_para({}).model
+    ClipDaemon(executar, porta=args.porta).servir()
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("video", help="Caminho do vídeo de entrada")
+    parser.add_argument("video", nargs="?", help="Caminho do vídeo de entrada")
     parser.add_argument("--max", type=int, default=11, help="Número máximo de cortes")
     parser.add_argument("--model", default="small", help="Modelo do Whisper (tiny, base, small, medium, large)")
+    parser.add_argument("--idioma", default=None, help="Idioma do áudio (ex: en, pt). Padrão: detecção automática")
+    parser.add_argument("--transcricao-workers", type=int, default=1,
+                        help="Processos de transcrição (> 1 divide o áudio nos silêncios e transcreve em paralelo)")
+    parser.add_argument("--sem-vad", action="store_true",
+                        help="Transcreve o áudio inteiro, sem pular os trechos sem fala")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="Ignora os caches e o manifesto (transcrição, momentos, trajetórias, IA e cortes prontos)")
+    parser.add_argument("--deteccao", choices=["auto", "texto", "uniforme"], default="auto",
+                        help="Escolha dos momentos: auto (texto + energia do áudio), texto (gatilhos) ou uniforme")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processos de renderização em paralelo (backends moviepy e ffmpeg)")
+    parser.add_argument("--backend", choices=["moviepy", "ffmpeg", "unico"], default="moviepy",
+                        help="Backend de renderização (ffmpeg = frames direto por pipe, mais rápido; "
+                             "unico = ffmpeg decodificando a fonte uma só vez para todos os cortes, "
+                             "num único processo: ignora --workers)")
+    parser.add_argument("--rastreamento", choices=["lote", "seguir"], default="lote",
+                        help="lote: DNN em cada amostra; seguir: detecta uma vez e segue por template, re-detectando numa ROI")
+    parser.add_argument("--sem-indice-rostos", action="store_true",
+                        help="Rastreia o rosto por corte em vez de indexar o episódio inteiro uma vez")
+    parser.add_argument("--preview", action="store_true",
+                        help="Prévia rápida em 270x480 (15 fps, ultrafast) em output/preview; "
+                             "o render final depois reaproveita o tracking e a IA em cache")
+    parser.add_argument("--sem-ia", action="store_true",
+                        help="Não chama a IA: usa só as traduções já em cache (útil com --preview)")
+    parser.add_argument("--seguir", action="store_true",
+                        help="Acompanha uma gravação em andamento (mkv/ts) e gera os cortes durante a live")
+    parser.add_argument("--inatividade", type=int, default=120,
+                        help="No modo --seguir, encerra após N segundos sem dados novos no arquivo")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Sobe o processo residente (modelos carregados uma vez) e atende jobs por HTTP local")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO, help="Porta do daemon")
+    parser.add_argument("--servidor", default=os.environ.get("CLIPPER_DAEMON"),
+                        help="URL de um daemon (ex: http://127.0.0.1:8765); a CLI só envia o job. Padrão: $CLIPPER_DAEMON")
+    parser.add_argument("--llm-rpm", type=int, default=30, help="Limite de requisições por minuto da IA")
+    parser.add_argument("--llm-tpm", type=int, default=6000, help="Limite de tokens por minuto da IA")
+    parser.add_argument("--llm-concorrencia", type=int, default=8, help="Requisições simultâneas à IA")
     args = parser.parse_args()
 
-    if os.path.exists(args.video):
+    if args.daemon:
+        servir_daemon(args)
+    elif args.video is None:
+        parser.error("informe o vídeo (ou use --daemon)")
+    elif args.servidor and not args.seguir and not os.path.exists(args.video):
+        print(f"❌ Erro: O arquivo '{args.video}' não foi encontrado.")
+    elif args.servidor and not args.seguir:
+        # Cliente fino: o daemon já tem os modelos na memória
+        cliente = DaemonClient(args.servidor)
+        job = {k: getattr(args, k) for k in OPCOES_JOB}
+        job["video"] = os.path.abspath(args.video)
+        job["output_dir"] = os.path.abspath("output")
+        try:
+            job_id = cliente.enviar(job)
+            print(f"📤 Job {job_id} enviado para {args.servidor}")
+            registro = cliente.aguardar(job_id)
+        except IOError as e:
+            print(f"❌ {e}")
+        else:
+            if registro["estado"] == "concluido":
+                for caminho in registro.get("resultado") or []:
+                    print(f"  🎬 {caminho}")
+                print("\n✅ PROCESSO CONCLUÍDO COM SUCESSO!")
+            else:
+                print(f"❌ Job falhou: {registro.get('erro')}")
+    elif os.path.exists(args.video):
         print(f"🚀 Iniciando Processamento BRUTO: {args.video}")
-        clipper = VideoClipper()
-        
-        print(f"🎙️ Carregando Whisper ({args.model}) e Transcrevendo...")
-        model_whisper = whisper.load_model(args.model)
-        
-        result = model_whisper.transcribe(
-            args.video,
-            word_timestamps=True,
-            task="transcribe",
-            verbose=True
+        clipper = VideoClipper(
+            llm_rpm=args.llm_rpm,
+            llm_tpm=args.llm_tpm,
+            llm_concorrencia=args.llm_concorrencia,
+            use_cache=not args.sem_cache
         )
         
-        v_meta = VideoFileClip(args.video)
-        total_duration = v_meta.duration
-        v_meta.close()
-        
-        # Lógica de distribuição dos cortes
-        intervalo = total_duration / (args.max + 1)
-        pontos_corte = [{"timestamp": i * intervalo} for i in range(1, args.max + 1)]
-        
-        print(f"✂️ Gerando {len(pontos_corte)} cortes...")
-        clipper.create_all_clips(args.video, result, pontos_corte, "output")
-        
+        print(f"🎙️ Transcrevendo com Whisper ({args.model})...")
+        processador = AudioProcessor(
+            model_size=args.model,
+            language=args.idioma,
+            use_cache=not args.sem_cache,
+            verbose=True,
+            workers=args.transcricao_workers,
+            vad=not args.sem_vad
+        )
+        if args.seguir:
+            # Gravação em andamento: transcreve e corta conforme o arquivo cresce
+            LiveFollower(
+                args.video, processador, clipper, "output",
+                max_clips=args.max,
+                inatividade=args.inatividade
+            ).executar()
+        else:
+            processar_episodio(
+                clipper, processador, args.video,
+                max_clips=args.max,
+                deteccao=args.deteccao,
+                workers=args.workers,
+                backend=args.backend,
+                rastreamento=args.rastreamento,
+                indice_rostos=not args.sem_indice_rostos,
+                preview=args.preview,
+                usar_ia=not args.sem_ia
+            )
+
         print("\n✅ PROCESSO CONCLUÍDO COM SUCESSO!")
     else:
         print(f"❌ Erro: O arquivo '{args.video}' não foi encontrado.")
@@ -0,0 +1,40 @@
+from modules.chunked_transcriber import costurar
+
+
+def _palavra(texto, inicio, fim):
+    return {'word': texto, 'start': inicio, 'end': fim}
+
+
+def _segmento(palavras):
+    return {
+        'start': palavras[0]['start'],
+        'end': palavras[-1]['end'],
+        'text': "".join(w['word'] for w in palavras),
+        'words': palavras,
+    }
+
+
+def test_segmentos_sobrepostos_no_mesmo_trecho_nao_perdem_palavras():
+    # O Whisper começa o segundo segmento antes do fim do primeiro
+    resultado = {'language': 'pt', 'segments': [
+        _segmento([_palavra(" a", 1.0, 1.5), _palavra(" b", 1.5, 2.0)]),
+        _segmento([_palavra(" c", 1.9, 2.4), _palavra(" d", 2.4, 3.0)]),
+    ]}
+    costurado = costurar([resultado], [(0.0, 10.0)])
+    assert costurado['text'] == " a b c d"
+    assert [seg['id'] for seg in costurado['segments']] == [0, 1]
+
+
+def test_fronteira_descarta_duplicadas_e_limita_ao_trecho():
+    primeiro = {'language': 'pt', 'segments': [
+        _segmento([_palavra(" um", 8.0, 9.0), _palavra(" dois", 9.0, 10.4)]),
+    ]}
+    # O segundo trecho repete a última palavra do primeiro
+    segundo = {'language': 'pt', 'segments': [
+        _segmento([_palavra(" dois", 9.5, 10.4), _palavra(" tres", 10.5, 11.0)]),
+        _segmento([_palavra(" quatro", 10.9, 11.5)]),
+    ]}
+    costurado = costurar([primeiro, segundo], [(0.0, 10.0), (10.0, 20.0)])
+    assert costurado['text'] == " um dois tres quatro"
+    assert costurado['segments'][0]['end'] == 10.0
+    assert costurado['language'] == 'pt'
@@ -0,0 +1,41 @@
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from modules.clip_daemon import ClipDaemon, DaemonClient, _handler
+
+
+@pytest.fixture
+def daemon():
+    daemon = ClipDaemon(lambda job: [job["video"] + ".mp4"], max_encerrados=2)
+    threading.Thread(target=daemon._trabalhar, daemon=True).start()
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _handler(daemon))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    daemon.url = f"http://127.0.0.1:{servidor.server_address[1]}"
+    yield daemon
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def test_job_pela_api(daemon):
+    cliente = DaemonClient(daemon.url)
+    registro = cliente.aguardar(cliente.enviar({"video": "ep1"}), intervalo=0.05)
+    assert registro["estado"] == "concluido"
+    assert registro["resultado"] == ["ep1.mp4"]
+
+
+def test_job_sem_video_e_rejeitado(daemon):
+    with pytest.raises(IOError, match="400"):
+        DaemonClient(daemon.url).enviar({"max": 3})
+
+
+def test_jobs_encerrados_antigos_sao_esquecidos(daemon):
+    ids = [daemon.enviar({"video": f"ep{k}"}) for k in range(5)]
+    limite = time.time() + 5
+    while time.time() < limite:
+        if all(daemon.consultar(j) is None or daemon.consultar(j)["estado"] == "concluido" for j in ids):
+            break
+        time.sleep(0.02)
+    assert [daemon.consultar(j) is not None for j in ids] == [False, False, False, True, True]
@@ -0,0 +1,32 @@
+import os
+
+import numpy as np
+
+from modules.disk_cache import ArrayCache
+
+
+def test_array_cache_reaproveita_o_array(tmp_path):
+    cache = ArrayCache(str(tmp_path))
+    chamadas = []
+
+    def construir():
+        chamadas.append(1)
+        return np.arange(10, dtype=np.float64)
+
+    cache.obter("a", construir)
+    valor = cache.obter("a", construir)
+    assert len(chamadas) == 1
+    assert (valor == np.arange(10)).all()
+
+
+def test_array_cache_despeja_os_menos_usados(tmp_path):
+    # Cada entrada tem ~928 bytes (800 de dados + cabeçalho .npy): cabem duas
+    cache = ArrayCache(str(tmp_path), max_bytes=2000)
+    cache.obter("a", lambda: np.zeros(100))
+    cache.obter("b", lambda: np.zeros(100))
+    os.utime(tmp_path / "a.npy", (1, 1))
+    os.utime(tmp_path / "b.npy", (2, 2))
+    cache.obter("a", lambda: np.ones(100))  # Hit: "a" passa a ser o mais recente
+    cache.obter("c", lambda: np.zeros(100))
+    assert sorted(os.listdir(tmp_path)) == ["a.npy", "c.npy"]
+    assert (cache.obter("a", lambda: np.ones(100)) == 0).all()  # Continua o valor em cache
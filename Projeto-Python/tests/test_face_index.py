@@ -0,0 +1,36 @@
+import numpy as np
+
+from modules.face_index import FaceTrack
+
+
+def _faixa():
+    return FaceTrack([0.0, 0.5], [[100, 50, 20, 20], [np.nan] * 4], [0.9, 0.0], [])
+
+
+def test_em_cache_reaproveita_o_rastreamento(tmp_path):
+    chamadas = []
+
+    def construir():
+        chamadas.append(1)
+        return _faixa()
+
+    FaceTrack._em_cache(str(tmp_path), "rostos.npz", construir)
+    faixa = FaceTrack._em_cache(str(tmp_path), "rostos.npz", construir)
+    assert len(chamadas) == 1
+    assert faixa.xs[0] == 100 and np.isnan(faixa.xs[1])
+
+
+def test_sem_cache_rastreia_de_novo_sem_gravar(tmp_path):
+    FaceTrack._em_cache(str(tmp_path), "rostos.npz", lambda: FaceTrack([0.0], [[1, 1, 1, 1]], [0.5], []))
+    chamadas = []
+
+    def construir():
+        chamadas.append(1)
+        return _faixa()
+
+    # Um índice velho no cache não é servido com use_cache=False
+    faixa = FaceTrack._em_cache(str(tmp_path), "rostos.npz", construir, use_cache=False)
+    FaceTrack._em_cache(str(tmp_path / "outro"), "rostos.npz", construir, use_cache=False)
+    assert len(chamadas) == 2
+    assert len(faixa) == 2
+    assert not (tmp_path / "outro").exists()
@@ -0,0 +1,45 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from modules.face_index import FaceTrack
+from modules.frame_sampler import FFMPEG_BIN, SequentialFrameSampler
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists(FFMPEG_BIN) and shutil.which(FFMPEG_BIN) is None,
+    reason="ffmpeg não encontrado"
+)
+
+
+@pytest.fixture
+def video(tmp_path):
+    caminho = str(tmp_path / "fonte.mp4")
+    subprocess.run([
+        FFMPEG_BIN, "-y", "-v", "error", "-f", "lavfi", "-i", "testsrc=size=320x180:rate=25:duration=4",
+        "-c:v", "libx264", "-pix_fmt", "yuv420p", caminho,
+    ], check=True)
+    return caminho
+
+
+def test_amostras_da_janela(video):
+    amostras = list(SequentialFrameSampler(video, 1.0, 3.0, 0.5, (320, 180)))
+    assert [t for t, _ in amostras] == [0.0, 0.5, 1.0, 1.5]
+    assert amostras[0][1].shape == (180, 320, 3)
+
+
+def test_fonte_ausente_levanta_erro(tmp_path):
+    with pytest.raises(IOError, match="ffmpeg falhou"):
+        list(SequentialFrameSampler(str(tmp_path / "nao_existe.mp4"), 0, 2, 0.5, (320, 180)))
+
+
+def test_parar_antes_do_fim_nao_e_erro(video):
+    for _ in SequentialFrameSampler(video, 0, 4, 0.1, (320, 180)):
+        break
+
+
+def test_rastreamento_vazio_nao_vai_para_o_cache(tmp_path):
+    vazio = FaceTrack([], [], [], [])
+    FaceTrack._em_cache(str(tmp_path), "vazio.npz", lambda: vazio)
+    assert not os.path.exists(tmp_path / "vazio.npz")
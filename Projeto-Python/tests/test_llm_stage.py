@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("groq")
+
+from modules import llm_stage  # noqa: E402
+from modules.llm_stage import LLMStage, TokenBucket  # noqa: E402
+
+
+class _ServidorChat:
+    """Imita POST .../chat/completions: responde 429 (com Retry-After) nas primeiras `limitadas` chamadas"""
+
+    def __init__(self, limitadas=1, retry_after="0.2"):
+        self.limitadas = limitadas
+        self.retry_after = retry_after
+        self.chamadas = []
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                corpo = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                servidor.chamadas.append((time.monotonic(), self.path, corpo))
+                if len(servidor.chamadas) <= servidor.limitadas:
+                    return self._responder(429, {"error": {"message": "rate limit", "type": "rate_limit"}},
+                                           {"Retry-After": servidor.retry_after})
+                texto = corpo["messages"][-1]["content"]
+                self._responder(200, {
+                    "id": "chatcmpl-teste",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": corpo["model"],
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": json.dumps({"eco": texto})},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                })
+
+            def _responder(self, codigo, corpo, cabecalhos=None):
+                dados = json.dumps(corpo).encode("utf-8")
+                self.send_response(codigo)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(dados)))
+                for chave, valor in (cabecalhos or {}).items():
+                    self.send_header(chave, valor)
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def log_message(self, formato, *args):
+                pass
+
+        self.http = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.http.server_address[1]}"
+        threading.Thread(target=self.http.serve_forever, daemon=True).start()
+
+    def fechar(self):
+        self.http.shutdown()
+        self.http.server_close()
+
+
+@pytest.fixture
+def servidor(monkeypatch):
+    servidor = _ServidorChat()
+    # O cliente Groq lê GROQ_BASE_URL quando o LLMStage não recebe base_url
+    monkeypatch.setenv("GROQ_BASE_URL", servidor.url)
+    yield servidor
+    servidor.fechar()
+
+
+def _jobs(*textos):
+    return [([{"role": "user", "content": t}], {"type": "json_object"}) for t in textos]
+
+
+def test_429_com_retry_after_e_depois_200(servidor):
+    etapa = LLMStage("chave-teste", "modelo-teste", requests_por_minuto=600, tokens_por_minuto=100000)
+    futuros = etapa.iniciar(
+        _jobs("olá"),
+        interpretar=lambda i, conteudo: json.loads(conteudo)["eco"],
+        fallback=lambda i: "fallback"
+    )
+    assert futuros[0].result(timeout=30) == "olá"
+    assert len(servidor.chamadas) == 2
+    assert servidor.chamadas[0][1].endswith("/chat/completions")
+    # A segunda tentativa respeitou o Retry-After do 429
+    assert servidor.chamadas[1][0] - servidor.chamadas[0][0] >= 0.2
+
+
+def test_falha_ao_iniciar_resolve_todos_os_futures(monkeypatch):
+    def quebrar(**kwargs):
+        raise RuntimeError("cliente indisponível")
+
+    monkeypatch.setattr(llm_stage, "AsyncGroq", quebrar)
+    etapa = LLMStage("chave-teste", "modelo-teste")
+    futuros = etapa.iniciar(_jobs("a", "b"), interpretar=lambda i, c: c, fallback=lambda i: f"fallback {i}")
+    assert [f.result(timeout=5) for f in futuros] == ["fallback 0", "fallback 1"]
+
+
+def test_limite_compartilhado_entre_chamadas(servidor):
+    servidor.limitadas = 0
+    # 60 requisições/min = 1 por segundo, balde começa com 60: esvazia e espera
+    etapa = LLMStage("chave-teste", "modelo-teste", requests_por_minuto=60, tokens_por_minuto=100000)
+    etapa._rpm.tokens = 1.0
+    primeira = etapa.iniciar(_jobs("um"), interpretar=lambda i, c: c, fallback=lambda i: None)
+    segunda = etapa.iniciar(_jobs("dois"), interpretar=lambda i, c: c, fallback=lambda i: None)
+    primeira[0].result(timeout=30)
+    segunda[0].result(timeout=30)
+    # Duas chamadas de iniciar, um balde: a segunda esperou ~1 s pela reposição
+    instantes = sorted(t for t, _, _ in servidor.chamadas)
+    assert instantes[1] - instantes[0] >= 0.8
+
+
+def test_token_bucket_reserva_em_ordem():
+    import asyncio
+
+    async def medir():
+        balde = TokenBucket(600)  # 10 por segundo
+        balde.tokens = 0.0
+        inicio = time.monotonic()
+        await asyncio.gather(balde.adquirir(1), balde.adquirir(1))
+        return time.monotonic() - inicio
+
+    assert 0.15 <= asyncio.run(medir()) < 1.0
@@ -0,0 +1,19 @@
+from modules.moment_detector import MomentDetector
+from modules.transcript_index import TranscriptIndex
+
+
+def _pesos(*textos):
+    segmentos = [{'start': float(k), 'end': k + 1.0, 'text': t} for k, t in enumerate(textos)]
+    return list(MomentDetector().pontuar_segmentos(TranscriptIndex({'segments': segmentos})))
+
+
+def test_gatilhos_casam_formas_flexionadas():
+    assert _pesos("Muitas perguntas hoje", "Eles perguntaram", "Chegaram uns pixes") == [1.0, 1.0, 1.0]
+
+
+def test_gatilho_no_meio_de_palavra_nao_conta():
+    assert _pesos("O sapixaba") == [0.0]
+
+
+def test_gatilhos_somam_por_segmento():
+    assert _pesos("Mandou um PIX e uma pergunta, lê aí") == [4.0]
@@ -0,0 +1,53 @@
+import os
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from modules.disk_cache import despejar_lru
+from modules.frame_sampler import FFMPEG_BIN
+from modules.pcm_audio import SharedPCM
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists(FFMPEG_BIN) and shutil.which(FFMPEG_BIN) is None,
+    reason="ffmpeg não encontrado"
+)
+
+
+def _gerar(caminho, com_audio):
+    cmd = [FFMPEG_BIN, "-y", "-v", "error", "-f", "lavfi", "-i", "testsrc=size=160x90:rate=10:duration=2"]
+    if com_audio:
+        cmd += ["-f", "lavfi", "-i", "sine=frequency=440:duration=2", "-c:a", "aac"]
+    cmd += ["-c:v", "libx264", "-pix_fmt", "yuv420p", caminho]
+    subprocess.run(cmd, check=True)
+    return caminho
+
+
+def test_video_sem_audio_gera_trilhas_vazias(tmp_path):
+    video = _gerar(str(tmp_path / "mudo.mp4"), com_audio=False)
+    pcm = SharedPCM(video, diretorio=str(tmp_path / "pcm"))
+    assert pcm.duracao == 0
+    assert not pcm.tem_audio
+    assert len(pcm.fatia_analise(0, 1)) == 0
+    # Sem trilha crua: o writer recebe o próprio vídeo e o '1:a:0?' é ignorado
+    assert pcm.entrada_ffmpeg() == (None, video)
+
+
+def test_fatias_do_memmap(tmp_path):
+    video = _gerar(str(tmp_path / "som.mp4"), com_audio=True)
+    pcm = SharedPCM(video, diretorio=str(tmp_path / "pcm"))
+    assert pcm.duracao == pytest.approx(2.0, abs=0.1)
+    fatia = pcm.fatia_saida_float(0.5, 1.0)
+    assert fatia.dtype == np.float32
+    assert fatia.shape == (int(0.5 * pcm.SR_SAIDA), 2)
+    assert np.abs(fatia).max() <= 1.0
+
+
+def test_despejo_lru_preserva_os_arquivos_em_uso(tmp_path):
+    for k, nome in enumerate(["a.f32", "b.s16", "c.f32", "d.s16", "outro.json"]):
+        caminho = tmp_path / nome
+        caminho.write_bytes(b"x" * 100)
+        os.utime(caminho, (k, k))  # a é o mais antigo
+    despejar_lru(str(tmp_path), 250, (".f32", ".s16"), manter=[str(tmp_path / "a.f32")])
+    assert sorted(os.listdir(tmp_path)) == ["a.f32", "d.s16", "outro.json"]
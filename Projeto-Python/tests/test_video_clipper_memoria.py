@@ -0,0 +1,128 @@
+import importlib
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import types
+
+import pytest
+
+from modules.frame_sampler import FFMPEG_BIN
+
+# Pico de memória aceito durante o render de um corte (além do que já estava
+# alocado antes): o pipeline guarda só o frame da fonte, o buffer do recorte
+# e os glifos. Um vazamento por frame em 1080x1920 passa disso em segundos.
+ORCAMENTO_RSS_MB = 600
+# Quanto o corte longo pode somar ao pico dos cortes curtos: a memória não
+# deve depender da duração do corte
+ORCAMENTO_LONGO_MB = 100
+
+
+def _importar_video_clipper(monkeypatch):
+    """Importa modules.video_clipper; moviepy/groq/tqdm ausentes viram módulos vazios (só para a trajetória)"""
+    for nome, atributos in (("moviepy", {"VideoFileClip": None}), ("groq", {"Groq": None}),
+                            ("tqdm", {"tqdm": lambda x, **k: x})):
+        try:
+            importlib.import_module(nome)
+        except ImportError:
+            monkeypatch.setitem(sys.modules, nome, types.SimpleNamespace(**atributos))
+    monkeypatch.delitem(sys.modules, "modules.video_clipper", raising=False)
+    return importlib.import_module("modules.video_clipper")
+
+
+def test_trajetoria_mantem_o_ultimo_rosto(monkeypatch):
+    video_clipper = _importar_video_clipper(monkeypatch)
+    # 4 segundos: sem rosto, rosto em 400, sem rosto (mantém 400), rosto em 900
+    caminho = video_clipper.VideoClipper.trajetoria(
+        [None, 400, None, 900], duracao=4, fps=10, tamanho_origem=(1280, 720)
+    )
+    assert caminho.largura_alvo == 405
+    assert len(caminho.offsets) == 40
+    por_segundo = caminho.offsets[::10]
+    # Centro do vídeo até o primeiro rosto; depois o último rosto visto
+    assert list(por_segundo) == [int(640 - 202.5), int(400 - 202.5), int(400 - 202.5), int(900 - 202.5)]
+    assert (caminho.offsets[10:30] == caminho.offsets[10]).all()
+
+
+def test_trajetoria_com_menos_amostras_que_segundos(monkeypatch):
+    video_clipper = _importar_video_clipper(monkeypatch)
+    caminho = video_clipper.VideoClipper.trajetoria(
+        [1200], duracao=2.5, fps=30, tamanho_origem=(1280, 720)
+    )
+    assert len(caminho.offsets) == 75  # ceil(2.5 * 30)
+    assert (caminho.offsets == 1280 - 405).all()  # Rosto na borda: recorte encostado nela
+
+
+class _Resposta:
+    def __init__(self, conteudo):
+        mensagem = types.SimpleNamespace(content=conteudo)
+        self.choices = [types.SimpleNamespace(message=mensagem)]
+
+
+class _GroqFalso:
+    """Cliente Groq local: devolve as mesmas palavras (sem rede)"""
+
+    def __init__(self):
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self._criar))
+
+    def _criar(self, messages, model, response_format):
+        texto = messages[-1]["content"].split("Texto Original:")[1].split("\n")[0].split()
+        return _Resposta(json.dumps({"conteudo": texto, "titulo": "Teste", "tags": "#teste"}))
+
+
+def _pico_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB no Linux
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="ru_maxrss em KB só no Linux")
+def test_corte_longo_nao_cresce_a_memoria(tmp_path, monkeypatch):
+    pytest.importorskip("moviepy")
+    if not os.path.exists(FFMPEG_BIN) and shutil.which(FFMPEG_BIN) is None:
+        pytest.skip("ffmpeg não encontrado")
+    video_clipper = importlib.import_module("modules.video_clipper")
+    # O moviepy grava o áudio temporário na pasta atual: isola do repositório
+    monkeypatch.chdir(tmp_path)
+
+    # Fonte sintética de 4 minutos em baixa resolução (o corte longo começa no meio, exigindo seek)
+    video = str(tmp_path / "fonte.mp4")
+    subprocess.run([
+        FFMPEG_BIN, "-y", "-v", "error",
+        "-f", "lavfi", "-i", "testsrc=size=320x180:rate=10:duration=240",
+        "-f", "lavfi", "-i", "sine=frequency=220:duration=240",
+        "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", "-c:a", "aac", video,
+    ], check=True)
+
+    palavras = [{"word": f" palavra{k}", "start": k * 0.5, "end": k * 0.5 + 0.4} for k in range(480)]
+    transcricao = {"segments": [{"start": 0.0, "end": 240.0, "text": "", "words": palavras}]}
+
+    # Saída pequena: o que importa é a memória não crescer com a duração, não o encode
+    clipper = video_clipper.VideoClipper(use_cache=False, tamanho_saida=(270, 480))
+    clipper.client = _GroqFalso()
+    monkeypatch.setattr(video_clipper.time, "sleep", lambda s: None)
+
+    # Pico de RSS no início de cada corte (o sampler é o primeiro passo do corte)
+    picos = []
+    sampler_original = video_clipper.SequentialFrameSampler
+
+    def sampler_medido(*args, **kwargs):
+        picos.append(_pico_rss_mb())
+        return sampler_original(*args, **kwargs)
+
+    monkeypatch.setattr(video_clipper, "SequentialFrameSampler", sampler_medido)
+
+    # Cortes 1-3 (CURTO) encostam no fim da fonte e ficam com 5 s; o 4º é LONGO (65 s)
+    momentos = [{"timestamp": 237.0}] * 3 + [{"timestamp": 120.0}]
+    antes = _pico_rss_mb()
+    clipper.create_all_clips(video, transcricao, momentos, str(tmp_path / "saida"))
+    depois = _pico_rss_mb()
+
+    pasta = tmp_path / "saida" / "corte_04_LONGO"
+    assert (pasta / "video_04.mp4").stat().st_size > 0
+    assert "Teste" in (pasta / "postagem.txt").read_text(encoding="utf-8")
+    assert depois - antes < ORCAMENTO_RSS_MB, f"pico de RSS cresceu {depois - antes:.0f} MB durante o render"
+    # 13x a duração dos cortes curtos: o pico quase não sai do patamar deles
+    assert depois - picos[3] < ORCAMENTO_LONGO_MB, (
+        f"o corte longo somou {depois - picos[3]:.0f} MB ao pico dos curtos ({picos[3] - antes:.0f} MB)"
+    )